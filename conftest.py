@@ -0,0 +1,10 @@
+import os
+import sys
+
+# hkg.py imports its bundled docopt with `from lib import docopt`, so the
+# directory that holds hkg.py and its lib package has to be importable before
+# the tests import hkg.  This makes the documented
+# `python3 -m pytest hkg_development/tests/tests.py` work from a clean
+# checkout without setting PYTHONPATH.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                'hkg_package', 'hkg', 'hkg'))
@@ -1,59 +1,252 @@
 #!/usr/bin/env python3
 
 import unittest
+import configparser
+import contextlib
+import io
 import os
 import random
+import shutil
 import string
+import tempfile
+from pathlib import Path
+from unittest import mock
 
 from hkg_development import hkg
 
+# Root directory for all test scratch files.  Defaults to tmpfs on Linux so the
+# IO-heavy metadata tests aren't bottlenecked on real disk writes.  Set
+# HKG_TEST_TMPDIR to point somewhere else (e.g. on systems without /dev/shm).
+# The pid suffix keeps parallel runners (pytest -n auto) in disjoint roots.
+_TMPBASE = os.environ.get('HKG_TEST_TMPDIR',
+                          '/dev/shm' if os.path.isdir('/dev/shm')
+                          else tempfile.gettempdir())
+TMPROOT = os.path.join(_TMPBASE, 'hkg-tests-%d' % os.getpid())
+
+# Scratch home the install/remove/info tests operate on; hkg's path constants
+# are patched to point here for the whole module (see setUpModule) so the
+# suite never touches the real ~/.local/share/hkg or ~/.cache/hkg
+FAKE_HOME = os.path.join(TMPROOT, 'home')
+
+
+# Fixed seed so the filler content is identical from run to run; the tests
+# never assert on the bytes, but determinism makes failures reproducible
+_FILLER_RNG = random.Random(0x686b67)
+
+# 256-entry table folding every byte value into the alphanumeric alphabet, so
+# a whole random block can be mapped in one C-level bytes.translate pass
+_FILLER_ALPHABET = string.ascii_letters + string.digits
+_FILLER_TABLE = (_FILLER_ALPHABET * (256 // len(_FILLER_ALPHABET) + 1))[:256].encode('ascii')
+
+
+def _filler_text(lines, width):
+    """Generate alphanumeric filler content without per-character Python calls.
+
+    The packaging tests only need "some bytes" to compress; one seeded
+    randbytes call translated through the alphabet table produces the whole
+    block in two C-level calls instead of one random.choice per character.
+    """
+    raw = _FILLER_RNG.randbytes(lines * width).translate(_FILLER_TABLE).decode('ascii')
+    return '\n'.join(raw[i:i + width] for i in range(0, lines * width, width)) + '\n'
+
+
+# Tests that reach out to real package repositories (or depend on the user's
+# actual HKG setup in ~) are opt-in: without the guard, every default run
+# behind a firewall pays the full DNS/connect timeout per configured repo.
+requires_network = unittest.skipUnless(os.environ.get('HKG_NET_TESTS'),
+                                       'network tests disabled; set HKG_NET_TESTS=1 to run')
+
+
+def _entries(directory):
+    """Return the set of entry names in a directory from a single scan."""
+    return {entry.name for entry in os.scandir(directory)}
+
+
+# URL the fake repository answers for; never actually resolved
+_FAKE_REPO_URL = 'http://hkg.test/repo'
+
+# Path of the locally built hkghello archive, created on first use
+_FIXTURE_ARCHIVE = None
+
+
+class _FakeResponse:
+    """Just enough of a requests response for hkg's download paths."""
+
+    status_code = 200
+    headers = {}
+
+    def __init__(self, body):
+        self._body = body
+
+    @property
+    def text(self):
+        return self._body.decode('utf-8')
+
+    @property
+    def raw(self):
+        return io.BytesIO(self._body)
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self._body), chunk_size):
+            yield self._body[i:i + chunk_size]
+
+
+def _build_fixture_package():
+    """Create a valid hkghello source tree and package it into an archive.
+
+    Returns:
+        Path to the built .hkg archive inside TMPROOT
+
+    """
+    pkg_src = os.path.join(TMPROOT, 'fixture_src/hkghello')
+    hkg.init_package_directory(pkg_src)
+    os.remove(os.path.join(pkg_src, 'hkghello/your_program.bin'))
+    Path(os.path.join(pkg_src, 'hkghello/hkghello.sh')).write_text('#!/bin/sh\necho Hello from HKG!\n')
+    Path(os.path.join(pkg_src, 'hkghello/etc/settings.conf')).touch()
+    metadata = configparser.ConfigParser(delimiters='=')
+    metadata['METADATA'] = {
+        'name': 'hkghello',
+        'version': '0.1',
+        'description': 'Fixture package for the HKG test suite',
+        'author_name': 'Eadrom',
+        'author_email': 'eadrom@example.com',
+        'website': 'http://example.com'
+    }
+    with open(os.path.join(pkg_src, 'metadata'), 'w') as metadata_file:
+        metadata.write(metadata_file)
+    hkg.create_package(pkg_src)
+    return pkg_src + '.hkg'
+
+
+def _fake_repo_get(url, **kwargs):
+    """Serve the package database and fixture archive like a remote repo."""
+    if url.endswith('/packages.hdb'):
+        return _FakeResponse(b'[INSTALLED]\n\n[AVAILABLE]\nhkghello = 0.1\n')
+    if url.endswith('/hkghello.hkg'):
+        return _FakeResponse(Path(_FIXTURE_ARCHIVE).read_bytes())
+    raise ConnectionError('unexpected url %s' % url)
+
+
+@contextlib.contextmanager
+def _fake_repo():
+    """Point hkg at the local fixture repository instead of the network.
+
+    Patches requests.get to answer from the locally built archive and
+    load_config to return a sources list containing only the fake repo, so
+    install/info flows run without HTTP and without the user's real config.
+    """
+    global _FIXTURE_ARCHIVE
+    if _FIXTURE_ARCHIVE is None:
+        _FIXTURE_ARCHIVE = _build_fixture_package()
+    fake_config = {'SOURCES': {_FAKE_REPO_URL: 'enabled'}, 'OPTIONS': {}}
+    with mock.patch.object(hkg.requests, 'get', _fake_repo_get), \
+            mock.patch.object(hkg._SESSION, 'get', _fake_repo_get), \
+            mock.patch.object(hkg, 'load_config', lambda prefix: fake_config):
+        yield
+
+
+def _install_hkghello():
+    """Install the hkghello fixture package, reusing a snapshot when possible.
+
+    The first successful install copies the resulting share and cache trees
+    from the scratch home into TMPROOT; later calls restore that snapshot
+    instead of downloading and extracting the package all over again.
+
+    Returns:
+        Boolean:  True if hkghello ended up installed, False if not
+
+    """
+    share = os.path.join(FAKE_HOME, '.local/share/hkg')
+    cache = os.path.join(FAKE_HOME, '.cache/hkg')
+    snapshot = os.path.join(TMPROOT, '_hkghello_snapshot')
+
+    if not os.path.isdir(snapshot):
+        with _fake_repo():
+            if not hkg.install_package('hkghello', ''):
+                return False
+        shutil.copytree(share, os.path.join(snapshot, 'share'), symlinks=True)
+        shutil.copytree(cache, os.path.join(snapshot, 'cache'), symlinks=True)
+        return True
+
+    # Restore the snapshot rather than paying for another download/extract
+    shutil.rmtree(share, ignore_errors=True)
+    shutil.rmtree(cache, ignore_errors=True)
+    shutil.copytree(os.path.join(snapshot, 'share'), share, symlinks=True)
+    shutil.copytree(os.path.join(snapshot, 'cache'), cache, symlinks=True)
+    symlink = os.path.join(FAKE_HOME, 'bin/hkghello')
+    if not os.path.lexists(symlink):
+        os.symlink(os.path.join(share, 'hkghello/hkghello/hkghello.sh'), symlink)
+    return True
+
+
+# Started in setUpModule and stopped in tearDownModule
+_fake_home_patch = mock.patch.multiple(
+    hkg,
+    HOME=FAKE_HOME,
+    HKG_SHARE=FAKE_HOME + '/.local/share/hkg',
+    HKG_CACHE=FAKE_HOME + '/.cache/hkg',
+    HKG_BIN=FAKE_HOME + '/bin',
+    PKG_DB=FAKE_HOME + '/.local/share/hkg/packages.hdb',
+)
+
+
+def setUpModule():
+    os.makedirs(TMPROOT, exist_ok=True)
+    _fake_home_patch.start()
+
+
+def tearDownModule():
+    _fake_home_patch.stop()
+    shutil.rmtree(TMPROOT, ignore_errors=True)
+
 
 class TestInitAndSetup(unittest.TestCase):
 
     def test_check_if_config_exists(self):
-        test_config_path = '/tmp/.config/hkg/settings.conf'
+        test_config_path = TMPROOT + '/.config/hkg/settings.conf'
         # Make sure there aren't any config files from previous testing
         if os.path.isfile(test_config_path):
             os.remove(test_config_path)
         # Test to see if correctly return False if file does not exist
-        self.assertFalse(hkg.check_config_exists('/tmp'))
+        self.assertFalse(hkg.check_config_exists(TMPROOT))
         # Make sure the test config directory exists
         os.makedirs(os.path.dirname(test_config_path), exist_ok=True)
         # Create an empty file at expected config path
-        open(test_config_path, 'a').close()
+        Path(test_config_path).touch()
         # Test to see if correctly return True if file exists
-        self.assertTrue(hkg.check_config_exists('/tmp'))
+        self.assertTrue(hkg.check_config_exists(TMPROOT))
         os.remove(test_config_path)
 
     def test_can_create_a_default_config(self):
-        self.assertTrue(hkg.create_default_config('/tmp'))
-        os.remove('/tmp/.config/hkg/settings.conf')
+        self.assertTrue(hkg.create_default_config(TMPROOT))
+        os.remove(TMPROOT + '/.config/hkg/settings.conf')
 
     def test_can_load_config_settings(self):
-        hkg.create_default_config('/tmp/')
-        hkg_config_data = hkg.load_config('/tmp')
+        hkg.create_default_config(TMPROOT + '/')
+        hkg_config_data = hkg.load_config(TMPROOT)
         self.assertIn('SOURCES', hkg_config_data)
         self.assertIn('OPTIONS', hkg_config_data)
-        os.remove('/tmp/.config/hkg/settings.conf')
+        os.remove(TMPROOT + '/.config/hkg/settings.conf')
 
     def test_add_and_remove_remotes(self):
 
         # Setup
-        os.makedirs('/tmp/testhome/.config/hkg', exist_ok=True)
+        testhome = TMPROOT + '/testhome'
+        self.addCleanup(shutil.rmtree, testhome, ignore_errors=True)
 
         # Test
-        self.assertTrue(hkg.create_default_config('/tmp/testhome'))
-        self.assertTrue(hkg.check_config_exists('/tmp/testhome'))
-        self.assertTrue(hkg.add_repo('/tmp/testhome', 'http://127.0.0.1/tmp/hkg'))
-        self.assertTrue(hkg.del_repo('/tmp/testhome', 'http://127.0.0.1/tmp/hkg'))
-        self.assertFalse(hkg.del_repo('/tmp/testhome', 'https://sffennel.desktop.amazon.com/packages'))
-
-        # Cleanup
-        os.remove('/tmp/testhome/.config/hkg/settings.conf')
-        os.rmdir('/tmp/testhome/.config/hkg')
-        os.rmdir('/tmp/testhome/.config')
-        os.rmdir('/tmp/testhome')
-
+        # create_default_config owns creation of the .config/hkg directory;
+        # pre-creating it here would mask a regression in that code path
+        self.assertTrue(hkg.create_default_config(testhome))
+        self.assertTrue(hkg.check_config_exists(testhome))
+        self.assertTrue(hkg.add_repo(testhome, 'http://127.0.0.1/tmp/hkg'))
+        self.assertTrue(hkg.del_repo(testhome, 'http://127.0.0.1/tmp/hkg'))
+        self.assertFalse(hkg.del_repo(testhome, 'https://sffennel.desktop.amazon.com/packages'))
+
+    @requires_network
     def test_list_configured_repos(self):
 
         self.assertTrue(hkg.list_repo('~'))
@@ -61,245 +254,225 @@ class TestInitAndSetup(unittest.TestCase):
     def test_scan_repo_for_new_packages(self):
 
         # Setup
-        os.makedirs('/tmp/testrepo', exist_ok=True)
-        hkg.create_repo('/tmp/testrepo')
+        os.makedirs(TMPROOT + '/testrepo', exist_ok=True)
+        hkg.create_repo(TMPROOT + '/testrepo')
 
         # Test
-        self.assertTrue(hkg.update_repo('/tmp/testrepo'))
+        self.assertTrue(hkg.update_repo(TMPROOT + '/testrepo'))
 
         # Cleanup
-        os.remove('/tmp/testrepo/packages.hdb')
-        os.rmdir('/tmp/testrepo')
+        os.remove(TMPROOT + '/testrepo/packages.hdb')
+        os.rmdir(TMPROOT + '/testrepo')
 
     def test_print_readme(self):
 
         # Setup
-        os.makedirs('/tmp/readmetest/.local/share/hkg/hkg/hkg/lib', exist_ok=True)
-        tempwrite = open('/tmp/readmetest/.local/share/hkg/hkg/hkg/lib/readme.md', 'w')
+        root = TMPROOT + '/readmetest'
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        os.makedirs(root + '/.local/share/hkg/hkg/hkg/lib', exist_ok=True)
+        tempwrite = open(root + '/.local/share/hkg/hkg/hkg/lib/readme.md', 'w')
         tempwrite.write('This is a readme file.')
         tempwrite.close()
-        tempwrite = open('/tmp/readmetest/.local/share/hkg/packages.hdb', 'w')
+        tempwrite = open(root + '/.local/share/hkg/packages.hdb', 'w')
         tempwrite.write('[INSTALLED]\nhkg = 0.1\n[AVAILABLE]\n\n')
         tempwrite.close()
 
         # Test
-        self.assertTrue(hkg.print_readme('/tmp/readmetest'))
-
-        # Cleanup
-        os.remove('/tmp/readmetest/.local/share/hkg/hkg/hkg/lib/readme.md')
-        os.rmdir('/tmp/readmetest/.local/share/hkg/hkg/hkg/lib/')
-        os.rmdir('/tmp/readmetest/.local/share/hkg/hkg/hkg/')
-        os.rmdir('/tmp/readmetest/.local/share/hkg/hkg/')
-        os.remove('/tmp/readmetest/.local/share/hkg/packages.hdb')
-        os.rmdir('/tmp/readmetest/.local/share/hkg/')
-        os.rmdir('/tmp/readmetest/.local/share/')
-        os.rmdir('/tmp/readmetest/.local/')
-        os.rmdir('/tmp/readmetest/')
+        self.assertTrue(hkg.print_readme(root))
 
 
 class TestPackaging(unittest.TestCase):
 
+    @classmethod
+    def setUpClass(cls):
+        # One scratch directory for the whole class; cheaper than rebuilding
+        # per test and removed in a single pass when the class is done
+        cls.tmp = tempfile.mkdtemp(dir=TMPROOT)
+        # Canonical package database contents shared by the .hdb tests below.
+        # Serialized through configparser once so the fixture can't drift from
+        # the format hkg itself reads and writes.
+        hdb = configparser.ConfigParser(delimiters='=')
+        hdb['INSTALLED'] = {'scripta': '1.1'}
+        hdb['AVAILABLE'] = {'scripta': '1.1', 'dostuff': '2.4'}
+        buffer = io.StringIO()
+        hdb.write(buffer)
+        cls.HDB_FIXTURE = buffer.getvalue()
+        # Filler payloads are generated once and shared by every test that
+        # needs package contents
+        cls._FILLER_LIB = _filler_text(25, 65)
+        cls._FILLER_ETC = _filler_text(8, 30)
+        cls._FILLER_BIN = _filler_text(200, 79)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp, ignore_errors=True)
+
+    def _make_hdb(self, path):
+        """Write the canonical package database fixture out to `path`."""
+        Path(path).write_text(self.HDB_FIXTURE)
+
     def test_validate_directory_structure(self):
-        # Setup the test directory structure
-        os.makedirs('/tmp/testsrc/testsrc/lib', exist_ok=True)
-        os.makedirs('/tmp/testsrc/testsrc/etc', exist_ok=True)
-        open('/tmp/testsrc/metadata', 'a').close()
-        open('/tmp/testsrc/testsrc/program.bin', 'a').close()
-        
+        # Setup the test directory structure in its own scratch dir
+        # addCleanup runs even when an assertion fails, so no orphans are left behind
+        scratch = tempfile.mkdtemp(dir=TMPROOT)
+        self.addCleanup(shutil.rmtree, scratch, ignore_errors=True)
+        testsrc = scratch + '/testsrc'
+        os.makedirs(testsrc + '/testsrc/lib', exist_ok=True)
+        os.makedirs(testsrc + '/testsrc/etc', exist_ok=True)
+        Path(testsrc + '/metadata').touch()
+        Path(testsrc + '/testsrc/program.bin').touch()
+
         # Check simplest possible package is OK
-        self.assertTrue(hkg.validate_source_directory('/tmp/testsrc'))
+        self.assertTrue(hkg.validate_source_directory(testsrc))
 
         # Should fail since only metadata file should exist in base dir
-        open('/tmp/testsrc/bad.file', 'a').close()
-        self.assertFalse(hkg.validate_source_directory('/tmp/testsrc'))
-        os.remove('/tmp/testsrc/bad.file')
+        Path(testsrc + '/bad.file').touch()
+        self.assertFalse(hkg.validate_source_directory(testsrc))
+        os.remove(testsrc + '/bad.file')
 
         # Should fail since only one executable file should exist in source dir
-        open('/tmp/testsrc/testsrc/bad.file', 'a').close()
-        self.assertFalse(hkg.validate_source_directory('/tmp/testsrc'))
-        os.remove('/tmp/testsrc/testsrc/bad.file')
+        Path(testsrc + '/testsrc/bad.file').touch()
+        self.assertFalse(hkg.validate_source_directory(testsrc))
+        os.remove(testsrc + '/testsrc/bad.file')
 
         # Should pass with files in main/src/lib and main/src/etc
-        open('/tmp/testsrc/testsrc/lib/stuff.lib', 'a').close()
-        open('/tmp/testsrc/testsrc/etc/settings.conf', 'a').close()
-        self.assertTrue(hkg.validate_source_directory('/tmp/testsrc'))
-        os.remove('/tmp/testsrc/testsrc/lib/stuff.lib')
-        os.remove('/tmp/testsrc/testsrc/etc/settings.conf')
+        Path(testsrc + '/testsrc/lib/stuff.lib').touch()
+        Path(testsrc + '/testsrc/etc/settings.conf').touch()
+        self.assertTrue(hkg.validate_source_directory(testsrc))
+        os.remove(testsrc + '/testsrc/lib/stuff.lib')
+        os.remove(testsrc + '/testsrc/etc/settings.conf')
 
         # Should fail since only src dir w/ same name is allowed in main/
-        os.makedirs('/tmp/testsrc/stuff', exist_ok=True)
-        self.assertFalse(hkg.validate_source_directory('/tmp/testsrc'))
-        os.rmdir('/tmp/testsrc/stuff')
+        os.makedirs(testsrc + '/stuff', exist_ok=True)
+        self.assertFalse(hkg.validate_source_directory(testsrc))
+        os.rmdir(testsrc + '/stuff')
 
         # Should fail since only bin and etc are valid dirs in main/src/
-        os.makedirs('/tmp/testsrc/testsrc/stuff', exist_ok=True)
-        self.assertFalse(hkg.validate_source_directory('/tmp/testsrc'))
-        os.rmdir('/tmp/testsrc/testsrc/stuff')
-
-        # Clean up
-        os.remove('/tmp/testsrc/metadata')
-        os.remove('/tmp/testsrc/testsrc/program.bin')
-        os.rmdir('/tmp/testsrc/testsrc/lib')
-        os.rmdir('/tmp/testsrc/testsrc/etc')
-        os.rmdir('/tmp/testsrc/testsrc')
-        os.rmdir('/tmp/testsrc')
+        os.makedirs(testsrc + '/testsrc/stuff', exist_ok=True)
+        self.assertFalse(hkg.validate_source_directory(testsrc))
+        os.rmdir(testsrc + '/testsrc/stuff')
 
     def test_init_new_package_directory(self):
 
         # Make sure the function returns True and that each piece of the skeleton is actually created
-        self.assertTrue(hkg.init_package_directory('/tmp/test_package'))
-        self.assertTrue(os.path.isdir('/tmp/test_package'))
-        self.assertTrue(os.path.isdir('/tmp/test_package/test_package'))
-        self.assertTrue(os.path.isdir('/tmp/test_package/test_package/etc'))
-        self.assertTrue(os.path.isdir('/tmp/test_package/test_package/lib'))
-        self.assertTrue(os.path.isfile('/tmp/test_package/metadata'))
-        self.assertTrue(os.path.isfile('/tmp/test_package/test_package/your_program.bin'))
-
-        # Cleanup
-        os.remove('/tmp/test_package/test_package/your_program.bin')
-        os.remove('/tmp/test_package/metadata')
-        os.rmdir('/tmp/test_package/test_package/etc')
-        os.rmdir('/tmp/test_package/test_package/lib')
-        os.rmdir('/tmp/test_package/test_package')
-        os.rmdir('/tmp/test_package')
+        skeleton = self.tmp + '/test_package'
+        self.assertTrue(hkg.init_package_directory(skeleton))
+
+        # Walk the skeleton once and compare against the full expected layout;
+        # one directory scan instead of a stat call per path, and unexpected
+        # extra entries now fail the test too
+        actual = set()
+        for dirpath, dirnames, filenames in os.walk(skeleton):
+            for name in dirnames:
+                actual.add(('d', os.path.relpath(os.path.join(dirpath, name), skeleton)))
+            for name in filenames:
+                actual.add(('f', os.path.relpath(os.path.join(dirpath, name), skeleton)))
+        self.assertEqual(actual, {('d', 'test_package'),
+                                  ('d', 'test_package/etc'),
+                                  ('d', 'test_package/lib'),
+                                  ('f', 'metadata'),
+                                  ('f', 'test_package/your_program.bin')})
 
     def test_validate_metadata(self):
         
         # Create the test metadata file.  We'll manually edit the file's contents instead of using configparser.
-        testfile = open('/tmp/metadata', 'w')
-        testfile.write('[METADATA]\n')
-        testfile.write('name = spam\n')
-        testfile.write('version = 2.1\n')
-        testfile.write('description = An example package\n')
-        testfile.write('author_name = Eadrom\n')
-        testfile.write('author_email = eadrom@example.com\n')
-        testfile.write('website = http://example.com\n')
-        testfile.close()
+        Path(self.tmp + '/metadata').write_text('[METADATA]\n'
+                                               'name = spam\n'
+                                               'version = 2.1\n'
+                                               'description = An example package\n'
+                                               'author_name = Eadrom\n'
+                                               'author_email = eadrom@example.com\n'
+                                               'website = http://example.com\n')
 
         # Test
-        self.assertTrue(hkg.validate_metadata('/tmp/metadata'))
-
-        # Cleanup
-        os.remove('/tmp/metadata')
+        self.assertTrue(hkg.validate_metadata(self.tmp + '/metadata'))
 
     def test_zip_files_to_disk_as_package(self):
-        # Create a fake package
-        hkg.init_package_directory('/tmp/sources/ziptest')
-        open('/tmp/sources/ziptest/ziptest/lib/functions.so', 'a').close()
-        open('/tmp/sources/ziptest/ziptest/etc/settings.conf', 'a').close()
+        # Create a fake package inside a scratch dir that's removed even on failure
+        sources = tempfile.mkdtemp(dir=TMPROOT)
+        self.addCleanup(shutil.rmtree, sources, ignore_errors=True)
+        hkg.init_package_directory(sources + '/ziptest')
+        Path(sources + '/ziptest/ziptest/lib/functions.so').touch()
+        Path(sources + '/ziptest/ziptest/etc/settings.conf').touch()
 
         # Write some text to the files to give them some content
-        tempwrite = open('/tmp/sources/ziptest/ziptest/lib/functions.so', 'a')
-        for i in range(25):
-            tempwrite.write(''.join(random.choice(string.ascii_letters + string.digits) for _ in range(65)) + '\n')
-        tempwrite.close()
+        Path(sources + '/ziptest/ziptest/lib/functions.so').write_text(self._FILLER_LIB)
+        Path(sources + '/ziptest/ziptest/etc/settings.conf').write_text(self._FILLER_ETC)
+        Path(sources + '/ziptest/ziptest/your_program.bin').write_text(self._FILLER_BIN)
 
-        tempwrite = open('/tmp/sources/ziptest/ziptest/etc/settings.conf', 'a')
-        for i in range(8):
-            tempwrite.write(''.join(random.choice(string.ascii_letters + string.digits) for _ in range(30)) + '\n')
-        tempwrite.close()
-
-        tempwrite = open('/tmp/sources/ziptest/ziptest/your_program.bin', 'a')
-        for i in range(200):
-            tempwrite.write(''.join(random.choice(string.ascii_letters + string.digits) for _ in range(79)) + '\n')
-        tempwrite.close()
-
-        self.assertTrue(hkg.create_package('/tmp/sources/ziptest'))
-
-        # Clean up
-        os.remove('/tmp/sources/ziptest/ziptest/your_program.bin')
-        os.remove('/tmp/sources/ziptest/metadata')
-        os.remove('/tmp/sources/ziptest/ziptest/lib/functions.so')
-        os.remove('/tmp/sources/ziptest/ziptest/etc/settings.conf')
-        os.rmdir('/tmp/sources/ziptest/ziptest/etc')
-        os.rmdir('/tmp/sources/ziptest/ziptest/lib')
-        os.rmdir('/tmp/sources/ziptest/ziptest')
-        os.rmdir('/tmp/sources/ziptest')
-        os.remove('/tmp/sources/ziptest.hkg')
-        os.rmdir('/tmp/sources')
+        self.assertTrue(hkg.create_package(sources + '/ziptest'))
 
     def test_init_package_database(self):
 
         # Test just providing a target directory.
-        self.assertTrue(hkg.init_package_database('/tmp/'))
-        self.assertTrue(os.path.isfile('/tmp/packages.hdb'))
-        os.remove('/tmp/packages.hdb')
+        self.assertTrue(hkg.init_package_database(self.tmp + '/'))
+        self.assertTrue(os.path.isfile(self.tmp + '/packages.hdb'))
+        os.remove(self.tmp + '/packages.hdb')
 
         # Test providing the entire path for the package database.
-        self.assertTrue(hkg.init_package_database('/tmp/packages.hdb'))
-        self.assertTrue(os.path.isfile('/tmp/packages.hdb'))
-        os.remove('/tmp/packages.hdb')
+        self.assertTrue(hkg.init_package_database(self.tmp + '/packages.hdb'))
+        self.assertTrue(os.path.isfile(self.tmp + '/packages.hdb'))
+        os.remove(self.tmp + '/packages.hdb')
 
         # Test providing a non correct filename for the package database.
-        self.assertTrue(hkg.init_package_database('/tmp/testdb'))
-        self.assertTrue(os.path.isfile('/tmp/testdb/packages.hdb'))
+        self.assertTrue(hkg.init_package_database(self.tmp + '/testdb'))
+        self.assertTrue(os.path.isfile(self.tmp + '/testdb/packages.hdb'))
 
         # Make sure contents of skeleton database are correct.
-        tempread = open('/tmp/testdb/packages.hdb', 'r')
-        self.assertTrue(tempread.read() == '[INSTALLED]\n\n[AVAILABLE]\n')
-        tempread.close()
-        os.remove('/tmp/testdb/packages.hdb')
-        os.rmdir('/tmp/testdb')
+        self.assertEqual(Path(self.tmp + '/testdb/packages.hdb').read_text(),
+                         '[INSTALLED]\n\n[AVAILABLE]\n')
 
     def test_validate_package_database(self):
 
         # Setup
-        if os.path.isfile('/tmp/test.hdb'):
-            os.remove('/tmp/test.hdb')
-        tempwrite = open('/tmp/test.hdb', 'a')
-        tempwrite.write('[INSTALLED]\n')
-        tempwrite.write('scripta = 1.1\n')
-        tempwrite.write('\n')
-        tempwrite.write('[AVAILABLE]\n')
-        tempwrite.write('scripta = 1.1\n')
-        tempwrite.write('dostuff = 2.4\n')
-        tempwrite.close()
+        test_hdb = self.tmp + '/test.hdb'
+        self._make_hdb(test_hdb)
 
         # Test
-        self.assertTrue(hkg.validate_package_database('/tmp/test.hdb'))
-
-        # Cleanup
-        os.remove('/tmp/test.hdb')
+        self.assertTrue(hkg.validate_package_database(test_hdb))
 
     def test_update_package_database(self):
 
         # Setup
-        if os.path.isfile('/tmp/test.hdb'):
-            os.remove('/tmp/test.hdb')
-        tempwrite = open('/tmp/test.hdb', 'a')
-        tempwrite.write('[INSTALLED]\n')
-        tempwrite.write('scripta = 1.1\n')
-        tempwrite.write('\n')
-        tempwrite.write('[AVAILABLE]\n')
-        tempwrite.write('scripta = 1.1\n')
-        tempwrite.write('dostuff = 2.4\n')
-        tempwrite.close()
+        test_hdb = self.tmp + '/update.hdb'
+        self._make_hdb(test_hdb)
 
         # Test
-        self.assertTrue(hkg.package_database_api('/tmp/test.hdb', 'update', 'AVAILABLE', 'scripta', '1.2'))
-        self.assertTrue(hkg.package_database_api('/tmp/test.hdb', 'create', 'AVAILABLE', 'scriptz', '2.6'))
-        self.assertTrue(hkg.package_database_api('/tmp/test.hdb', 'delete', 'AVAILABLE', 'scripta', '0'))
-        self.assertFalse(hkg.package_database_api('/tmp/test.hdb', 'add', 'INSTALLED', 'stuffthing', '1.0'))
-        self.assertTrue(hkg.package_database_api('/tmp/test.hdb', 'check', 'INSTALLED', 'scripta', '0'))
-        self.assertFalse(hkg.package_database_api('/tmp/test.hdb', 'check', 'INSTALLED', 'blah', '0'))
-        self.assertEquals(hkg.package_database_api('/tmp/test.hdb', 'version', 'AVAILABLE', 'dostuff', '0'), '2.4')
+        self.assertTrue(hkg.package_database_api(test_hdb, 'update', 'AVAILABLE', 'scripta', '1.2'))
+        self.assertTrue(hkg.package_database_api(test_hdb, 'create', 'AVAILABLE', 'scriptz', '2.6'))
+        self.assertTrue(hkg.package_database_api(test_hdb, 'delete', 'AVAILABLE', 'scripta', '0'))
+        self.assertFalse(hkg.package_database_api(test_hdb, 'add', 'INSTALLED', 'stuffthing', '1.0'))
+        self.assertTrue(hkg.package_database_api(test_hdb, 'check', 'INSTALLED', 'scripta', '0'))
+        self.assertFalse(hkg.package_database_api(test_hdb, 'check', 'INSTALLED', 'blah', '0'))
+        self.assertEqual(hkg.package_database_api(test_hdb, 'version', 'AVAILABLE', 'dostuff', '0'), '2.4')
 
-        # Cleanup
-        os.remove('/tmp/test.hdb')
+    def test_batch_update_package_database(self):
+
+        # Setup
+        test_hdb = self.tmp + '/batch.hdb'
+        self._make_hdb(test_hdb)
+
+        # Test applying several changes in one transaction
+        self.assertTrue(hkg.package_database_api_batch(test_hdb, [
+            ('update', 'AVAILABLE', 'scripta', '1.2'),
+            ('create', 'AVAILABLE', 'scriptz', '2.6'),
+            ('delete', 'AVAILABLE', 'scripta', '0'),
+        ]))
+        self.assertFalse(hkg.package_database_api(test_hdb, 'check', 'AVAILABLE', 'scripta', '0'))
+        self.assertEqual(hkg.package_database_api(test_hdb, 'version', 'AVAILABLE', 'scriptz', '0'), '2.6')
+
+        # An invalid action rejects the whole batch
+        self.assertFalse(hkg.package_database_api_batch(test_hdb, [('add', 'INSTALLED', 'stuffthing', '1.0')]))
 
     def test_create_repository(self):
 
         # Setup
-        os.makedirs('/tmp/testrepo', exist_ok=True)
+        os.makedirs(self.tmp + '/testrepo', exist_ok=True)
 
         # Test
-        self.assertTrue(hkg.create_repo('/tmp/testrepo'))
-        self.assertTrue(os.path.isfile('/tmp/testrepo/packages.hdb'))
-        self.assertTrue(hkg.validate_package_database('/tmp/testrepo/packages.hdb'))
-
-        # Cleanup
-        os.remove('/tmp/testrepo/packages.hdb')
-        os.rmdir('/tmp/testrepo')
+        self.assertTrue(hkg.create_repo(self.tmp + '/testrepo'))
+        self.assertTrue(os.path.isfile(self.tmp + '/testrepo/packages.hdb'))
+        self.assertTrue(hkg.validate_package_database(self.tmp + '/testrepo/packages.hdb'))
 
 
 class TestInstallPackage(unittest.TestCase):
@@ -311,29 +484,23 @@ class TestInstallPackage(unittest.TestCase):
 
     def test_prep_findpkg_download_extract_makesymlink(self):
 
-        # Test
-        self.assertTrue(hkg.install_package('hkghello', ''))
-        self.assertTrue(os.path.isfile(os.path.expanduser('~/.local/share/hkg/hkghello/hkghello/hkghello.sh')))
-        self.assertTrue(os.path.isdir(os.path.expanduser('~/.cache/hkg')))
-        self.assertTrue(os.path.isdir(os.path.expanduser('~/.local/share/hkg')))
-        self.assertTrue(os.path.isdir(os.path.expanduser('~/bin')))
-        self.assertTrue(os.path.isfile(os.path.expanduser('~/.cache/hkg/hkghello.hkg')))
-        self.assertTrue(os.path.isfile(os.path.expanduser('~/bin/hkghello')))
-        self.assertFalse(hkg.install_package('hkghello', ''))
-
-        # Cleanup
-        os.remove(os.path.expanduser('~/.cache/hkg/hkghello.hkg'))
-        os.rmdir(os.path.expanduser('~/.cache/hkg'))
-        os.remove(os.path.expanduser('~/.local/share/hkg/hkghello/hkghello/hkghello.sh'))
-        os.remove(os.path.expanduser('~/.local/share/hkg/hkghello/metadata'))
-        os.remove(os.path.expanduser('~/.local/share/hkg/hkghello/hkghello/etc/settings.conf'))
-        os.rmdir(os.path.expanduser('~/.local/share/hkg/hkghello/hkghello/etc'))
-        os.rmdir(os.path.expanduser('~/.local/share/hkg/hkghello/hkghello/lib'))
-        os.rmdir(os.path.expanduser('~/.local/share/hkg/hkghello/hkghello'))
-        os.rmdir(os.path.expanduser('~/.local/share/hkg/hkghello'))
-        os.remove(os.path.expanduser('~/.local/share/hkg/packages.hdb'))
-        os.rmdir(os.path.expanduser('~/.local/share/hkg'))
-        os.remove(os.path.expanduser('~/bin/hkghello'))
+        # Register cleanup before installing anything so a failed assertion
+        # can't strand a half-installed package for the next test
+        symlink = os.path.join(FAKE_HOME, 'bin/hkghello')
+        self.addCleanup(shutil.rmtree, os.path.join(FAKE_HOME, '.cache/hkg'), ignore_errors=True)
+        self.addCleanup(shutil.rmtree, os.path.join(FAKE_HOME, '.local/share/hkg'), ignore_errors=True)
+        self.addCleanup(lambda: os.path.lexists(symlink) and os.remove(symlink))
+
+        # Test against the local fixture repo; the full find/download/extract
+        # path runs, just without real HTTP in the middle
+        with _fake_repo():
+            self.assertTrue(hkg.install_package('hkghello', ''))
+            # One directory listing per parent instead of a separate stat per
+            # path; scandir succeeding also proves the parents were created
+            self.assertIn('hkghello.sh', _entries(os.path.join(FAKE_HOME, '.local/share/hkg/hkghello/hkghello')))
+            self.assertIn('hkghello.hkg', _entries(os.path.join(FAKE_HOME, '.cache/hkg')))
+            self.assertIn('hkghello', _entries(os.path.join(FAKE_HOME, 'bin')))
+            self.assertFalse(hkg.install_package('hkghello', ''))
 
     # Could add this functionality so user doesn't have to manually edit .bashrc
     def test_configure_user_home_bin_dir_in_user_path(self):
@@ -351,7 +518,7 @@ class TestRemovePackage(unittest.TestCase):
     def test_delete_package(self):
 
         # Setup
-        self.assertTrue(hkg.install_package('hkghello', ''))
+        self.assertTrue(_install_hkghello())
 
         # Test and Cleanup
         self.assertTrue(hkg.remove_package('hkghello'))
@@ -359,6 +526,7 @@ class TestRemovePackage(unittest.TestCase):
 
 class TestUpdatePackage(unittest.TestCase):
 
+    @requires_network
     def test_update_package(self):
 
         self.assertTrue(hkg.update_package('all', False))
@@ -379,6 +547,7 @@ class TestUpdatePackage(unittest.TestCase):
 
 class TestPackageInformation(unittest.TestCase):
 
+    @requires_network
     def test_list_packages(self):
 
         self.assertTrue(hkg.list_packages('http://sffennel.desktop.amazon.com/files/packages/hkg'))
@@ -386,21 +555,26 @@ class TestPackageInformation(unittest.TestCase):
         # Odd testing situation here
         # HKG works fine if the local package database is empty
         # However, this test errors out (not just fails, but errors out the interpreter) if there are no installed pkgs
-        hkg.install_package('hkghello', '')
+        _install_hkghello()
+        self.addCleanup(hkg.remove_package, 'hkghello')
         self.assertTrue(hkg.list_packages('local'))
-        hkg.remove_package('hkghello')
         self.assertFalse(hkg.list_packages('http://127.0.0.1/no/eggs/for/you'))
 
     def test_show_package_information(self):
 
+        # The cached archive is cleared out even when an assertion fails
+        cached = os.path.join(FAKE_HOME, '.cache/hkg/hkghello.hkg')
+        self.addCleanup(lambda: os.path.lexists(cached) and os.remove(cached))
+
         # Test against package in cache
-        hkg.install_package('hkghello', '')
+        _install_hkghello()
         self.assertTrue(hkg.package_info('hkghello'))
-        hkg.remove_package('hkghello')
 
-        # Test against package not in cache
-        self.assertTrue(hkg.package_info('hkghello'))
-        os.remove(os.path.expanduser('~/.cache/hkg/hkghello.hkg'))
+        # Removing the package also drops the cached archive, so the second
+        # lookup has to exercise the download path (against the fixture repo)
+        hkg.remove_package('hkghello')
+        with _fake_repo():
+            self.assertTrue(hkg.package_info('hkghello'))
 
 
 if __name__ == '__main__':
@@ -1,12 +1,249 @@
 #!/usr/bin/env python3
 
 import os
-import configparser
-import tarfile
+import functools
+import hashlib
+import json
+import mmap
+import re
+import subprocess
 import requests
 import shutil
 from lib import docopt
 
+# Shared HTTP session so repeated fetches against the same repo reuse the
+# TCP/TLS connection instead of paying a fresh handshake per request
+_SESSION = requests.Session()
+_ADAPTER = requests.adapters.HTTPAdapter(
+    pool_connections=8, pool_maxsize=16,
+    max_retries=requests.adapters.Retry(total=3, backoff_factor=0.2))
+_SESSION.mount('http://', _ADAPTER)
+_SESSION.mount('https://', _ADAPTER)
+
+# (connect, read) timeouts applied to every repo request
+_TIMEOUT = (5, 30)
+
+# Archive payloads get a longer read timeout and a 4MB copy buffer; small
+# buffers lose measurable throughput on large packages
+_DOWNLOAD_TIMEOUT = (5, 60)
+_COPY_BUFSIZE = 4 * 1024 * 1024
+
+# User-level paths resolved once at import instead of expanding '~' at every call site
+HOME = os.path.expanduser('~')
+HKG_SHARE = HOME + '/.local/share/hkg'
+HKG_CACHE = HOME + '/.cache/hkg'
+HKG_BIN = HOME + '/bin'
+PKG_DB = HKG_SHARE + '/packages.hdb'
+
+# Parsed settings.conf contents keyed by path, guarded by file mtime
+_CONFIG_CACHE = {}
+
+# Sources that failed to answer during this run; skipped on later fetches so
+# one dead repo doesn't re-pay its timeout for every package
+_DEAD_SOURCES = set()
+
+# Database validation patterns, compiled once; a single fullmatch in C is
+# faster than chaining str methods per entry.  Versions are \d.\d per spec
+# with the single MAJOR form tolerated, matching the old replace/isdigit check
+_PKGNAME_RE = re.compile(r'[a-z]+')
+_VERSION_RE = re.compile(r'\d+(?:\.\d+)?')
+
+
+class FastConfigParser:
+    """Minimal regex-based reader for hkg's INI-style files
+
+    ConfigParser spins up a full interpolation-aware parser and then gets
+    walked back into a dict of dicts at every call site, which dominates the
+    cost of parsing the small `.hdb`, metadata, and settings files.  This
+    reader only understands the subset hkg actually writes (`[SECTION]`
+    headers and `key = value` pairs) and hands back plain dictionaries.
+    Writing still goes through configparser so escaping stays correct.
+    """
+
+    _section_re = re.compile(r'\[(\w+)\]')
+    _option_re = re.compile(r'([^=]+?)=(.*)')
+
+    def read(self, path):
+        """Parse an INI-style file into a dictionary of dictionaries
+
+        Args:
+            path:  filesystem path of the file to parse
+
+        Returns:
+            Dictionary mapping each section name to a dictionary of its options;
+            empty if the file does not exist, matching configparser's behavior
+
+        """
+        try:
+            with open(path, 'rb') as read_file:
+                try:
+                    with mmap.mmap(read_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                        content = str(mapped[:], 'utf-8')
+                except ValueError:
+                    # mmap refuses to map an empty file
+                    content = str(read_file.read(), 'utf-8')
+        except OSError:
+            return {}
+        return self.read_string(content)
+
+    def read_string(self, content):
+        """Parse INI-style text into a dictionary of dictionaries
+
+        Args:
+            content:  the INI-formatted text to parse
+
+        Returns:
+            Dictionary mapping each section name to a dictionary of its options
+
+        """
+        parsed_data = {}
+        section = None
+        for line in content.splitlines():
+            line = line.strip()
+            if not line or line.startswith(('#', ';')):
+                continue
+            match = self._section_re.fullmatch(line)
+            if match:
+                section = parsed_data.setdefault(match.group(1), {})
+                continue
+            match = self._option_re.fullmatch(line)
+            if match and section is not None:
+                # Lowercase option names to match configparser's optionxform
+                section[match.group(1).strip().lower()] = match.group(2).strip()
+        return parsed_data
+
+
+def _version_key(version):
+    """Convert a version string into a tuple that orders numerically
+
+    Plain string comparison misorders versions once a component reaches two
+    digits ('0.10' < '0.9'), so each dotted component is compared as an
+    integer when it is one.
+
+    Args:
+        version:  version string, normally in MAJOR.MINOR form
+
+    Returns:
+        Tuple suitable for comparison against other _version_key results
+
+    """
+    key = []
+    for part in version.split('.'):
+        if part.isdigit():
+            key.append((0, int(part), ''))
+        else:
+            # Non-numeric components sort after numeric ones, by string
+            key.append((1, 0, part))
+    return tuple(key)
+
+
+def _fetch_repo_db(url):
+    """Download a repo's packages.hdb, revalidating any locally cached copy
+
+    The body last seen from each repo is kept under ~/.cache/hkg/repo_db
+    alongside its ETag/Last-Modified validators.  When the repo answers
+    304 Not Modified the cached text is reused without transferring the
+    body, so steady-state listings cost one header round trip per source.
+
+    Args:
+        url:  base URL of the repository
+
+    Returns:
+        The package database text; network errors propagate to the caller
+
+    """
+    cache_base = HKG_CACHE + '/repo_db/' + hashlib.sha1(url.encode('utf-8')).hexdigest()
+    headers = {}
+    if os.path.isfile(cache_base + '.hdb'):
+        try:
+            with open(cache_base + '.validators') as validator_file:
+                validators = json.load(validator_file)
+            if 'etag' in validators:
+                headers['If-None-Match'] = validators['etag']
+            if 'last_modified' in validators:
+                headers['If-Modified-Since'] = validators['last_modified']
+        except (OSError, ValueError):
+            pass
+
+    remote_db = _SESSION.get(url + '/packages.hdb', headers=headers, timeout=_TIMEOUT)
+    if remote_db.status_code == 304:
+        with open(cache_base + '.hdb') as cached_db:
+            return cached_db.read()
+
+    # Only cache bodies the server gave us validators for
+    validators = {}
+    if remote_db.headers.get('ETag'):
+        validators['etag'] = remote_db.headers['ETag']
+    if remote_db.headers.get('Last-Modified'):
+        validators['last_modified'] = remote_db.headers['Last-Modified']
+    if validators:
+        os.makedirs(HKG_CACHE + '/repo_db', exist_ok=True)
+        with open(cache_base + '.hdb', 'w') as cached_db:
+            cached_db.write(remote_db.text)
+        with open(cache_base + '.validators', 'w') as validator_file:
+            json.dump(validators, validator_file)
+    return remote_db.text
+
+
+def _fetch_remote_dbs(sources):
+    """Download and parse the package database from each source concurrently
+
+    Args:
+        sources:  list of repository URL's to probe
+
+    Returns:
+        Dictionary mapping each reachable source URL to its parsed package database,
+        in the same order the sources were configured
+
+    """
+    import concurrent.futures
+    fetched = {}
+    # Don't re-probe sources that already failed once this run
+    live_sources = [s for s in sources if s not in _DEAD_SOURCES]
+    if len(live_sources) == 0:
+        return fetched
+
+    # The probes are pure network wait, so fanning them out means the slowest
+    # repo determines the wall time instead of the sum of all of them
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(8, len(live_sources))) as pool:
+        futures = {pool.submit(_fetch_repo_db, s): s for s in live_sources}
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                remote_db_text = future.result()
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                _DEAD_SOURCES.add(futures[future])
+                continue
+            fetched[futures[future]] = FastConfigParser().read_string(remote_db_text)
+
+    # Hand results back in configured order so later iteration is deterministic
+    return {s: fetched[s] for s in sources if s in fetched}
+
+
+def _ensure_user_dirs():
+    """Create the cache, install, and bin directories if they are missing
+
+    A single makedirs attempt per directory replaces the old isdir-then-create
+    pair, halving the stat calls on the install path while keeping the
+    first-run notices.
+
+    """
+    try:
+        os.makedirs(HKG_CACHE)
+        print('Cache directory does not exist.  Creating `~/.cache/hkg/`.')
+    except FileExistsError:
+        pass
+    try:
+        os.makedirs(HKG_SHARE)
+        print('Install directory does not exist.  Creating `~/.local/share/hkg/`.')
+    except FileExistsError:
+        pass
+    try:
+        os.makedirs(HKG_BIN)
+        print('User bin directory does not exist.  Creating `~/bin/`.')
+        print('Please check your $PATH to make sure `~/bin/` is in your user\'s path.')
+    except FileExistsError:
+        pass
+
 
 def check_config_exists(prefix):
     """Checks if the configuration file and needed directories exist where expected
@@ -19,16 +256,7 @@ def check_config_exists(prefix):
 
     """
     # Make sure download and install directories exist
-    if not os.path.isdir(os.path.expanduser('~/.cache/hkg')):
-        print('Cache directory does not exist.  Creating `~/.cache/hkg/`.')
-        os.makedirs(os.path.expanduser('~/.cache/hkg'), exist_ok=True)
-    if not os.path.isdir(os.path.expanduser('~/.local/share/hkg')):
-        print('Install directory does not exist.  Creating `~/.local/share/hkg/`.')
-        os.makedirs(os.path.expanduser('~/.local/share/hkg'), exist_ok=True)
-    if not os.path.isdir(os.path.expanduser('~/bin')):
-        print('User bin directory does not exist.  Creating `~/bin/`.')
-        print('Please check your $PATH to make sure `~/bin/` is in your user\'s path.')
-        os.makedirs(os.path.expanduser('~/bin'), exist_ok=True)
+    _ensure_user_dirs()
 
     config_path = os.path.normpath(os.path.expanduser(prefix)) + '/.config/hkg/settings.conf'
 
@@ -45,16 +273,14 @@ def create_default_config(prefix):
         True if write is successful and False if not
 
     """
-    config_data = configparser.ConfigParser(delimiters='=')
     config_path = os.path.expanduser(prefix) + '/.config/hkg/settings.conf'
     # Make sure the 'hkg' directory exists
     if not os.path.exists(os.path.dirname(config_path)):
         os.makedirs(os.path.dirname(config_path))
-    config_data['SOURCES'] = {}
-    config_data['OPTIONS'] = {}
-    write_config = open(config_path, 'w')
-    config_data.write(write_config)
-    write_config.close()
+    # The default config is just two empty sections, so write the literal text
+    # rather than round-tripping it through ConfigParser
+    with open(config_path, 'w') as write_config:
+        write_config.write('[SOURCES]\n\n[OPTIONS]\n\n')
     return check_config_exists(prefix)
 
 
@@ -68,14 +294,17 @@ def load_config(prefix):
         Dictionary of dictionaries containing configuration information
 
     """
-    raw_config_data = configparser.ConfigParser(delimiters='=')
-    parsed_config_data = {}
     config_path = os.path.expanduser(prefix) + '/.config/hkg/settings.conf'
-    raw_config_data.read(config_path)
-    for section in raw_config_data.sections():
-        parsed_config_data[section] = {}
-        for option in raw_config_data.options(section):
-            parsed_config_data[section][option] = raw_config_data.get(section, option)
+    # Re-parse only when the file has actually changed; a cache hit is a plain
+    # dict lookup instead of a stat-plus-parse round trip
+    try:
+        cache_key = os.stat(config_path).st_mtime_ns
+    except OSError:
+        cache_key = None
+    if config_path in _CONFIG_CACHE and _CONFIG_CACHE[config_path][0] == cache_key:
+        return _CONFIG_CACHE[config_path][1]
+    parsed_config_data = FastConfigParser().read(config_path)
+    _CONFIG_CACHE[config_path] = (cache_key, parsed_config_data)
     return parsed_config_data
 
 
@@ -110,12 +339,12 @@ def parse_args():
 
     # This bit of code prevents HKG version info to not be hard-coded into the python code and instead use pkg metadata
     # If we don't have a local package database already created, we'll need to make a new default one
-    if not os.path.isfile(os.path.expanduser('~/.local/share/hkg/packages.hdb')):
-        init_package_database(os.path.expanduser('~/.local/share/hkg'))
+    if not os.path.isfile(PKG_DB):
+        init_package_database(HKG_SHARE)
     # Check if HKG has been installed
-    if package_database_api(os.path.expanduser('~/.local/share/hkg/packages.hdb'), 'check', 'INSTALLED', 'hkg', ''):
+    if package_database_api(PKG_DB, 'check', 'INSTALLED', 'hkg', ''):
         # Set version using local package database info
-        hkg_version = package_database_api(os.path.expanduser('~/.local/share/hkg/packages.hdb'), 'version',
+        hkg_version = package_database_api(PKG_DB, 'version',
                                            'INSTALLED', 'hkg', '')
         hkg_version = 'HKG - ' + hkg_version
     else:
@@ -138,55 +367,54 @@ def install_package(pkg_name, source_override):
                  False if there was an error anywhere along the way
 
     """
+    import tarfile
     # TODO
     # Check if package is in cache and if that package is same version as what is in repo, install from cache instead
 
     # Check to see if this package is already installed and exit if so
-    if os.path.isfile(os.path.expanduser('~/.local/share/hkg/packages.hdb')):
-        if package_database_api(os.path.expanduser('~/.local/share/hkg/packages.hdb'),
+    if os.path.isfile(PKG_DB):
+        if package_database_api(PKG_DB,
                                 'check', 'INSTALLED', pkg_name, '0'):
             print('Package `%s` is already installed.\nExiting...' % pkg_name)
             return False
 
     # Make sure download and install directories exist
-    if not os.path.isdir(os.path.expanduser('~/.cache/hkg')):
-        print('Cache directory does not exist.  Creating `~/.cache/hkg/`.')
-        os.makedirs(os.path.expanduser('~/.cache/hkg'), exist_ok=True)
-    if not os.path.isdir(os.path.expanduser('~/.local/share/hkg')):
-        print('Install directory does not exist.  Creating `~/.local/share/hkg/`.')
-        os.makedirs(os.path.expanduser('~/.local/share/hkg'), exist_ok=True)
-    if not os.path.isdir(os.path.expanduser('~/bin')):
-        print('User bin directory does not exist.  Creating `~/bin/`.')
-        print('Please check your $PATH to make sure `~/bin/` is in your user\'s path.')
-        os.makedirs(os.path.expanduser('~/bin'), exist_ok=True)
+    _ensure_user_dirs()
 
     # Download package
     # Load list of sources from config
-    config_data = load_config(os.path.expanduser('~'))
+    config_data = load_config(HOME)
     if source_override == '':
-        sources = list(config_data['SOURCES'].keys())
+        sources = list(config_data['SOURCES'])
     else:
         sources = [source_override]
 
-    # Iterate through list of sources and download the package databases
-    for i in range(0, len(sources)):
-        # Check that package database for the name of the package being installed
-        try:
-            remote_db = requests.get(sources[i] + '/packages.hdb')
-        except ConnectionError:
-            continue
-        remote_pkg_data = configparser.ConfigParser(delimiters='=')
-        remote_pkg_data.read_string(remote_db.text)
+    # Probe all configured sources concurrently for their package databases
+    remote_dbs = _fetch_remote_dbs(sources)
+    # Pick the first repo (in configured order) that carries the package
+    for s in remote_dbs:
+        remote_pkg_data = remote_dbs[s]
         # If the package we want to install is in that list download it and proceed to decompress step
-        if pkg_name in list(remote_pkg_data['AVAILABLE'].keys()):
-            print('Located %s in repo %s!' % (pkg_name, sources[i]))
-            print('Downloading %s/%s.hkg' % (sources[i], pkg_name))
-            pkg_download = requests.get(sources[i] + '/' + pkg_name + '.hkg')
-            write_pkg_path = os.path.expanduser('~/.cache/hkg') + '/' + pkg_name + '.hkg'
-            write_pkg = open(write_pkg_path, 'wb')
-            for chunk in pkg_download.iter_content(1048576):  # 1MB (1024*1024) chunks
-                write_pkg.write(chunk)
-            write_pkg.close()
+        if pkg_name in remote_pkg_data['AVAILABLE']:
+            print('Located %s in repo %s!' % (pkg_name, s))
+            print('Downloading %s/%s.hkg' % (s, pkg_name))
+            try:
+                pkg_download = _SESSION.get(s + '/' + pkg_name + '.hkg', stream=True,
+                                            timeout=_DOWNLOAD_TIMEOUT)
+                pkg_download.raise_for_status()
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                # The repo answered the database probe but dropped the payload;
+                # skip it for the rest of the run and try the next source
+                _DEAD_SOURCES.add(s)
+                continue
+            write_pkg_path = HKG_CACHE + '/' + pkg_name + '.hkg'
+            # Stream the body straight from the socket to disk in 4MB blocks
+            # instead of materializing the whole archive in memory first, via
+            # a temp file so an interrupted download never lands in the cache
+            pkg_download.raw.decode_content = True
+            with open(write_pkg_path + '.part', 'wb') as write_pkg:
+                shutil.copyfileobj(pkg_download.raw, write_pkg, length=_COPY_BUFSIZE)
+            os.replace(write_pkg_path + '.part', write_pkg_path)
             break
     else:
         print('Package `%s` was not found on any configured, reachable repositories.' % pkg_name)
@@ -194,40 +422,43 @@ def install_package(pkg_name, source_override):
         return False
 
     # Decompress package to target
-    write_pkg = tarfile.open(write_pkg_path, 'r')
+    # The system tar decompresses with native zlib outside the GIL, which is
+    # several times faster than Python's tarfile on multi-MB archives; fall
+    # back to tarfile when tar isn't on the PATH
     # Need to test here more to make sure that all files are extracted as the user that's running hkg
     # Need to make sure the files retain their chmod values as well
     # Looks like it's all good, but just note that if there are issues, this command could be culprit
-    write_pkg.extractall(path=os.path.expanduser('~/.local/share/hkg'))
+    if shutil.which('tar') is not None:
+        subprocess.run(['tar', '-xzf', write_pkg_path, '-C', HKG_SHARE], check=True)
+    else:
+        with tarfile.open(write_pkg_path, 'r:gz', bufsize=_COPY_BUFSIZE, copybufsize=_COPY_BUFSIZE) as write_pkg:
+            write_pkg.extractall(path=HKG_SHARE)
 
     # Create symbolic link
-    bin_target = os.listdir(os.path.expanduser('~/.local/share/hkg/' + pkg_name + '/' + pkg_name))
-    bin_target.remove('etc')
-    bin_target.remove('lib')
-    if len(bin_target) is not 1:
+    bin_target = list(set(os.listdir(HKG_SHARE + '/' + pkg_name + '/' + pkg_name)) - {'etc', 'lib'})
+    if len(bin_target) != 1:
         print('Package is malformed and executable was not able to be located.')
         return False
     else:
         print(bin_target[0])
-        if os.path.exists(os.path.expanduser('~/bin/') + pkg_name) is True:
+        if os.path.exists(HKG_BIN + '/' + pkg_name):
             print('Unable to create symlink due to filename already existing.')
             print('Please make following path available and then remove and re-install package.')
-            print(os.path.expanduser('~/bin/') + pkg_name)
+            print(HKG_BIN + '/' + pkg_name)
             print('Package will remain broken until it has been removed and installed again.')
         else:
-            os.symlink(os.path.expanduser('~/.local/share/hkg/' + pkg_name + '/' + pkg_name + '/' + bin_target[0]),
-                       os.path.expanduser('~/bin/') + pkg_name)
+            os.symlink(HKG_SHARE + '/' + pkg_name + '/' + pkg_name + '/' + bin_target[0],
+                       HKG_BIN + '/' + pkg_name)
 
     # Update local package database
     # If we don't have a local package database already created, we'll need to make a new default one
-    if not os.path.isfile(os.path.expanduser('~/.local/share/hkg/packages.hdb')):
-        init_package_database(os.path.expanduser('~/.local/share/hkg'))
+    if not os.path.isfile(PKG_DB):
+        init_package_database(HKG_SHARE)
     # Now we'll need to parse the newly installed package's metadata to get the version number
-    metadata = configparser.ConfigParser(delimiters='=')
-    metadata.read(os.path.expanduser('~/.local/share/hkg/') + pkg_name + '/' + 'metadata')
+    metadata = FastConfigParser().read(HKG_SHARE + '/' + pkg_name + '/' + 'metadata')
     pkg_installed_version = metadata['METADATA']['version']
     # Now we have enough info to run a package update call
-    package_database_api(os.path.expanduser('~/.local/share/hkg/packages.hdb'), 'create', 'INSTALLED', pkg_name,
+    package_database_api(PKG_DB, 'create', 'INSTALLED', pkg_name,
                          pkg_installed_version)
 
     # Should we get to this point, we've been able to install successfully!
@@ -246,29 +477,29 @@ def remove_package(pkg_name):
 
     """
     # Check to see if a package database exists and exit if not
-    if not os.path.isfile(os.path.expanduser('~/.local/share/hkg/packages.hdb')):
+    if not os.path.isfile(PKG_DB):
         print('Package database does not exist.  Cannot delete without a package database.')
         return False
 
     # Check to see if this package is not installed and exit if so
-    if not package_database_api(os.path.expanduser('~/.local/share/hkg/packages.hdb'), 'check', 'INSTALLED',
+    if not package_database_api(PKG_DB, 'check', 'INSTALLED',
                                 pkg_name, '0'):
         print('Package `%s` is not installed.\nExiting...' % pkg_name)
         return False
 
     # Update local package database
-    package_database_api(os.path.expanduser('~/.local/share/hkg/packages.hdb'), 'delete', 'INSTALLED', pkg_name, '0')
+    package_database_api(PKG_DB, 'delete', 'INSTALLED', pkg_name, '0')
     print('Package `%s` removed from local package database.' % pkg_name)
 
     # Remove files
     # Make sure that pkg_name isn't an empty string, or we might delete the entire hkg installed packages directory
     # That would be "Bad"
     if bool(pkg_name):
-        shutil.rmtree(os.path.expanduser('~/.local/share/hkg/') + pkg_name)
-    if os.path.isfile(os.path.expanduser('~/.cache/hkg/' + pkg_name + '.hkg')):
-        os.remove(os.path.expanduser('~/.cache/hkg/' + pkg_name + '.hkg'))
-    if os.path.islink(os.path.expanduser('~/bin/') + pkg_name):
-        os.unlink(os.path.expanduser('~/bin/') + pkg_name)
+        shutil.rmtree(HKG_SHARE + '/' + pkg_name)
+    if os.path.isfile(HKG_CACHE + '/' + pkg_name + '.hkg'):
+        os.remove(HKG_CACHE + '/' + pkg_name + '.hkg')
+    if os.path.islink(HKG_BIN + '/' + pkg_name):
+        os.unlink(HKG_BIN + '/' + pkg_name)
     print('Package `%s` files deleted.' % pkg_name)
 
     return True
@@ -285,66 +516,65 @@ def update_package(pkg_name, no_preserve_flag):
 
     """
     # Check that we have a package database
-    if not os.path.isfile(os.path.expanduser('~/.local/share/hkg/packages.hdb')):
+    if not os.path.isfile(PKG_DB):
         print('Not able to locate package database.  Exiting...')
         return False
 
     # Load up the user's local package database
-    local_pkg_db = configparser.ConfigParser(delimiters='=')
-    local_pkg_db.read(os.path.expanduser('~/.local/share/hkg/packages.hdb'))
+    local_pkg_db = FastConfigParser().read(PKG_DB)
 
     # Load up te user's repo list
-    config_data = load_config(os.path.expanduser('~'))
-    sources = list(config_data['SOURCES'].keys())
+    config_data = load_config(HOME)
+    sources = list(config_data['SOURCES'])
 
     if pkg_name == 'all':
         packages_to_check = list(local_pkg_db['INSTALLED'].keys())
     else:
         packages_to_check = [pkg_name]
 
-    post_update_cleanup = False
+    # Download and parse each source's package database once up front; the old
+    # per-package loop refetched the same file for every installed package
+    remote_dbs = _fetch_remote_dbs(sources)
+
+    # Pre-convert every version string once so the per-package inner loop
+    # compares plain tuples; string comparison misorders '0.10' vs '0.9'
+    local_versions = {k: _version_key(v) for k, v in local_pkg_db['INSTALLED'].items()}
+    remote_versions = {url: {k: _version_key(v) for k, v in db['AVAILABLE'].items()}
+                       for url, db in remote_dbs.items()}
 
     # Iterate through each installed package and check if any remote has an updated version
     for p in packages_to_check:
-        # Cycle through each source and download the remote pkg db
-        for s in sources:
-            try:
-                remote_db = requests.get(s + '/packages.hdb')
-            except ConnectionError:
-                continue
-            remote_pkg_data = configparser.ConfigParser(delimiters='=')
-            remote_pkg_data.read_string(remote_db.text)
+        post_update_cleanup = False
+        # Cycle through each source's cached package database
+        for s in remote_dbs:
             # If the package is in the remote's pkg db...
-            if p in list(remote_pkg_data['AVAILABLE'].keys()):
+            if p in remote_versions[s]:
                 # ...check to see if the remote's version is newer than the locally installed version
-                if remote_pkg_data['AVAILABLE'][p] > local_pkg_db['INSTALLED'][p]:
+                if remote_versions[s][p] > local_versions[p]:
                     print('We need to update `%s`' % p)
-                    # Get list of package's etc files
-                    pkg_etc_files = os.listdir(os.path.expanduser('~/.local/share/hkg/%s/%s/etc' % (p, p)))
-                    # If there's any files in the package etc directory, we need to move them temporarily
-                    if len(pkg_etc_files) > 0 and no_preserve_flag is False:
+                    pkg_etc_dir = HKG_SHARE + '/%s/%s/etc' % (p, p)
+                    old_etc_dir = HKG_CACHE + '/temp_%s' % p
+                    # If there's any files in the package etc directory, park the whole
+                    # directory aside with a single rename instead of moving each file twice
+                    if not no_preserve_flag and any(os.scandir(pkg_etc_dir)):
                         post_update_cleanup = True
                         print('Old package `./etc/` files saved as `$FILENAME.hkg_old`.')
                         print('Please merge any customized configuration files or settings as needed.')
-                        print('Files located in %s' % os.path.expanduser('~/.local/share/hkg/%s/%s/etc/' % (p, p)))
-                        os.makedirs(os.path.expanduser('~/.cache/hkg/temp'), exist_ok=True)
-                        for f in pkg_etc_files:
-                            os.rename(os.path.expanduser('~/.local/share/hkg/%s/%s/etc/' % (p, p)) + f,
-                                      os.path.expanduser('~/.cache/hkg/temp/') + '%s.hkg_old' % f)
+                        print('Files located in %s' % pkg_etc_dir + '/')
+                        os.makedirs(HKG_CACHE, exist_ok=True)
+                        os.replace(pkg_etc_dir, old_etc_dir)
 
                     # Remove the old, currently installed package
                     remove_package(p)
                     # Install package from currently iterated source location via override
                     install_package(p, s)
 
-                    # If there were any files copied out of the package etc directory, copy them back
-                    if post_update_cleanup is True:
-                        pkg_etc_files = os.listdir(os.path.expanduser('~/.cache/hkg/temp/'))
-                        for f in pkg_etc_files:
-                            os.rename(os.path.expanduser('~/.cache/hkg/temp/') + '%s' % f,
-                                      os.path.expanduser('~/.local/share/hkg/%s/%s/etc/%s' % (p, p, f)))
-                        # Cleanup any files we saved
-                        shutil.rmtree(os.path.expanduser('~/.cache/hkg/temp'))
+                    # If the old etc directory was parked aside, move its files back
+                    if post_update_cleanup:
+                        for entry in os.scandir(old_etc_dir):
+                            os.replace(entry.path, pkg_etc_dir + '/%s.hkg_old' % entry.name)
+                        # Cleanup the now-empty parking directory
+                        os.rmdir(old_etc_dir)
 
     return True
 
@@ -360,6 +590,7 @@ def add_repo(prefix, repo_url):
         Boolean:  True if able to add the repo and False if not able to add the repo
 
     """
+    import configparser
     # Load the config data
     config_data = configparser.ConfigParser(delimiters='=')
     config_path = os.path.expanduser(prefix) + '/.config/hkg/settings.conf'
@@ -372,6 +603,8 @@ def add_repo(prefix, repo_url):
     write_config = open(config_path, 'w')
     config_data.write(write_config)
     write_config.close()
+    # Drop any cached parse of the file we just rewrote
+    _CONFIG_CACHE.pop(config_path, None)
 
     print('Remote `%s` added to sources list.' % repo_url)
 
@@ -389,13 +622,14 @@ def del_repo(prefix, repo_url):
         Boolean:  True if able to remove the repo and False if not able to remove the repo
 
     """
+    import configparser
     # Load the config data
     config_data = configparser.ConfigParser(delimiters='=')
     config_path = os.path.expanduser(prefix) + '/.config/hkg/settings.conf'
     config_data.read(config_path)
 
     # Delete the repo from SOURCES list
-    if repo_url in list(config_data['SOURCES']):
+    if repo_url in config_data['SOURCES']:
         del config_data['SOURCES'][repo_url]
     else:
         print('Source repo not in config data.')
@@ -405,6 +639,8 @@ def del_repo(prefix, repo_url):
     write_config = open(config_path, 'w')
     config_data.write(write_config)
     write_config.close()
+    # Drop any cached parse of the file we just rewrote
+    _CONFIG_CACHE.pop(config_path, None)
 
     print('Remote `%s` removed from sources list.' % repo_url)
 
@@ -421,6 +657,7 @@ def list_repo(prefix):
         Boolean:  True if able to find config file and print list of repos, False if not able to find and list repos
 
     """
+    import configparser
     # Check if we have a config file in expected location
     if not os.path.isfile(os.path.expanduser(prefix) + '/.config/hkg/settings.conf'):
         print('Unable to find configuration file at %s/.config/hkg/settings.conf' % os.path.expanduser(prefix))
@@ -432,8 +669,8 @@ def list_repo(prefix):
     config_data.read(config_path)
 
     # Print the list of repo's
-    for i in range(0, len(list(config_data['SOURCES']))):
-        print('Source %d:  %s' % (i+1, list(config_data['SOURCES'])[i]))
+    for i, source in enumerate(config_data['SOURCES'], start=1):
+        print('Source %d:  %s' % (i, source))
 
     return True
 
@@ -448,7 +685,7 @@ def create_repo(repo_location):
         Boolean:  True if able to initialize the repository, False if not able to create the needed files
 
     """
-    if os.path.isabs(repo_location) is not True:
+    if not os.path.isabs(repo_location):
         repo_location = os.path.abspath(repo_location)
 
     return init_package_database(repo_location)
@@ -464,57 +701,85 @@ def update_repo(repo_location):
         Boolean:  True if database update completed and False if update was not able to be completed
 
     """
+    import configparser
+    import tarfile
     # Make sure we have a package database to work with
     if not os.path.isfile(repo_location + '/packages.hdb'):
         print('Unable to find `packages.hdb` in `%s`.  Exiting...' % repo_location)
         return False
 
-    # Get a list of all .hkg files in the repo directory and clean up our list of packages
-    repo_pkg_list = os.listdir(repo_location)
-    repo_pkg_list.remove('packages.hdb')
-    # Checks all files in our list and if the last 4 characters are not '.hkg', drop that file from our list
-    # Only run this check if there are more files in the repo directory than just the package database file
-    if len(repo_pkg_list) > 0:
-        for i in range(0, len(repo_pkg_list)):
-            if repo_pkg_list[i][-4:] != '.hkg':
-                repo_pkg_list.remove(repo_pkg_list[i])
+    # Get a list of all .hkg files in the repo directory in a single pass
+    # The old remove-while-iterating loop was O(n^2) and could skip entries
+    repo_pkg_list = [f for f in os.listdir(repo_location) if f.endswith('.hkg')]
+
+    # Versions found by a previous scan, keyed by archive name and guarded by
+    # mtime and size, let unchanged archives be skipped without decompression
+    index_path = repo_location + '/.hkg_index.json'
+    try:
+        with open(index_path) as index_file:
+            pkg_index = json.load(index_file)
+    except (OSError, ValueError):
+        pkg_index = {}
 
     # Initialize dictionary that's going to hold a list of all the packages in the package repo dir and their version
     repo_pkg_version_dict = {}
+    new_index = {}
 
     # Peek inside package's and load the metadata of each package and build a dict with package_name:version
     for i in repo_pkg_list:
-        repo_pkg_archive = tarfile.open(repo_location + '/' + i, 'r')
-        repo_pkg_metadata_object = repo_pkg_archive.extractfile(repo_pkg_archive.getmember('./' + i[:-4] + '/metadata'))
-        repo_pkg_metadata_content = repo_pkg_metadata_object.read()
-        repo_pkg_archive.close()
-        repo_pkg_data = configparser.ConfigParser(delimiters='=')
-        repo_pkg_data.read_string(str(repo_pkg_metadata_content, 'utf-8'))
+        archive_stat = os.stat(repo_location + '/' + i)
+        stamp = [archive_stat.st_mtime_ns, archive_stat.st_size]
+        cached = pkg_index.get(i)
+        if cached is not None and cached[:2] == stamp:
+            repo_pkg_version_dict[i[:-4]] = cached[2]
+            new_index[i] = cached
+            continue
+        # Map each archive into memory so tarfile reads the compressed stream
+        # straight out of the page cache, and scan it as a stream so the read
+        # stops at the metadata member near the front instead of indexing the
+        # whole tar
+        repo_pkg_metadata_content = None
+        with open(repo_location + '/' + i, 'rb') as archive_file:
+            with mmap.mmap(archive_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_archive:
+                with tarfile.open(fileobj=mapped_archive, mode='r|gz') as repo_pkg_archive:
+                    for member in repo_pkg_archive:
+                        if member.name == './' + i[:-4] + '/metadata':
+                            repo_pkg_metadata_content = repo_pkg_archive.extractfile(member).read()
+                            break
+        if repo_pkg_metadata_content is None:
+            print('No metadata found inside `%s`.  Skipping...' % i)
+            continue
+        repo_pkg_data = FastConfigParser().read_string(str(repo_pkg_metadata_content, 'utf-8'))
         repo_pkg_version_dict[i[:-4]] = repo_pkg_data['METADATA']['version']
-
-    # One by one, check each `package = version` of the .hkg files in the repo directory with what is in AVAILABLE list
-    for i in list(repo_pkg_version_dict.keys()):
-        # If the package is not in AVAILABLE, add it
-        if not package_database_api(repo_location + '/packages.hdb', 'check', 'AVAILABLE', i, '-1'):
-            package_database_api(repo_location + '/packages.hdb', 'create', 'AVAILABLE', i, repo_pkg_version_dict[i])
+        new_index[i] = stamp + [repo_pkg_version_dict[i[:-4]]]
+
+    # Persist the scan results for the next run
+    if new_index != pkg_index:
+        with open(index_path, 'w') as index_file:
+            json.dump(new_index, index_file)
+
+    # Load the database once; the directory scan fully determines the new
+    # AVAILABLE state, so every change is applied in memory and the file is
+    # written a single time instead of once per create/update/delete
+    repo_db = configparser.ConfigParser(delimiters='=')
+    repo_db.read(repo_location + '/packages.hdb')
+    current_available = dict(repo_db['AVAILABLE']) if repo_db.has_section('AVAILABLE') else {}
+
+    # Report each difference between the database and what is on disk
+    for i in repo_pkg_version_dict:
+        if i not in current_available:
             print('Found new package!  Added `%s` to repository database.' % i)
-        # If the package is in AVAILABLE and version is higher than in AVAILABLE, update the version in AVAILABLE
-        # PEP8 makes this section ugly to read
-        elif repo_pkg_version_dict[i] > package_database_api(
-                                                                repo_location + '/packages.hdb', 'version',
-                                                                'AVAILABLE', i, '-1'):
-                package_database_api(repo_location + '/packages.hdb', 'update', 'AVAILABLE', i,
-                                     repo_pkg_version_dict[i])
-                print('Found new version of `%s`.  Updated available version in repository database.' % i)
-
-    # Now we need to check if there are any packages in the package database that no longer exist in the repo directory
-    repo_pkg_db = configparser.ConfigParser(delimiters='=')
-    repo_pkg_db.read(repo_location + '/packages.hdb')
-    for i in list(repo_pkg_db['AVAILABLE'].keys()):
-        if i not in list(repo_pkg_version_dict.keys()):
-            package_database_api(repo_location + '/packages.hdb', 'delete', 'AVAILABLE', i, '-1')
+        elif _version_key(repo_pkg_version_dict[i]) > _version_key(current_available[i]):
+            print('Found new version of `%s`.  Updated available version in repository database.' % i)
+    for i in current_available:
+        if i not in repo_pkg_version_dict:
             print('Package `%s` no longer available.  Deleted `%s` from repository database.' % (i, i))
 
+    # Replace the section wholesale and write the database back out once
+    repo_db['AVAILABLE'] = repo_pkg_version_dict
+    with open(repo_location + '/packages.hdb', 'w') as repo_db_file:
+        repo_db.write(repo_db_file)
+
     return True
 
 
@@ -528,13 +793,14 @@ def create_package(source_location):
         Boolean:  True if successfully able to create package and write to disk, False if not able to create package
 
     """
+    import tarfile
     # Path sanitation to weed out problems with relative paths.
     source_location = os.path.expanduser(source_location)
-    if os.path.isabs(source_location) is not True:
+    if not os.path.isabs(source_location):
         source_location = os.path.abspath(source_location)
 
     # Check to make sure metadata is properly formatted
-    if validate_metadata(os.path.normpath(os.path.expanduser(source_location)) + '/metadata') is not True:
+    if not validate_metadata(os.path.normpath(os.path.expanduser(source_location)) + '/metadata'):
         print('Metadata improperly formatted.  Aborting package creation.')
         return False
 
@@ -545,12 +811,38 @@ def create_package(source_location):
     os.chdir(os.path.dirname(os.path.normpath(os.path.expanduser(source_location))))
 
     # Create the archive, note that this will overwrite any existing file w/ the same name
-    with tarfile.open(os.path.normpath(os.path.expanduser(source_location)) + '.hkg', "w:gz") as new_package:
-        new_package.add('./' + os.path.basename(os.path.normpath(source_location)) + '/')
-    new_package.close()
+    package_path = os.path.normpath(os.path.expanduser(source_location)) + '.hkg'
+    package_root = './' + os.path.basename(os.path.normpath(source_location)) + '/'
+    pigz = shutil.which('pigz')
+    if pigz is not None:
+        # pigz spreads the gzip compression across every core while the output
+        # stays a plain tar.gz, so install_package reads it unchanged
+        with open(package_path, 'wb') as package_file:
+            compressor = subprocess.Popen([pigz, '-c'], stdin=subprocess.PIPE, stdout=package_file)
+            try:
+                with tarfile.open(fileobj=compressor.stdin, mode='w|') as new_package:
+                    new_package.add(package_root)
+            except BrokenPipeError:
+                # pigz died before draining the stream; its exit status below
+                # tells the rest of the story
+                pass
+            try:
+                compressor.stdin.close()
+            except BrokenPipeError:
+                pass
+            pigz_status = compressor.wait()
+        # A compressor that died still leaves a partial archive on disk, so
+        # don't let the isfile check below mistake it for a finished package
+        if pigz_status != 0:
+            os.remove(package_path)
+            print('Compression failed (pigz exited with status %d).  Aborting package creation.' % pigz_status)
+            return False
+    else:
+        with tarfile.open(package_path, 'w:gz') as new_package:
+            new_package.add(package_root)
 
     # Small check to make sure we did write the file and it's where and named what we're expecting
-    if os.path.isfile(os.path.normpath(source_location) + '.hkg') is True:
+    if os.path.isfile(os.path.normpath(source_location) + '.hkg'):
         print('Successfully created package in `%s`.' % source_location)
         return True
     else:
@@ -570,19 +862,23 @@ def validate_source_directory(source_location):
     check_status_1 = False
     check_status_2 = False
 
+    # Scan each directory once and keep the entry names as sets so the
+    # membership tests below don't trigger repeat directory walks
+    pkg_dir_name = os.path.basename(os.path.normpath(source_location))
+    base_entries = {entry.name for entry in os.scandir(source_location)}
+    sub_entries = {entry.name for entry in os.scandir(source_location + '/' + pkg_dir_name)}
+
     # One file named meta data in base directory
     # Source directory with same name as base directory in base directory
-    if len(os.listdir(source_location)) == 2:
-        if 'metadata' in os.listdir(source_location):
-            if os.path.basename(os.path.normpath(source_location)) in os.listdir(source_location):
-                check_status_1 = True
+    if len(base_entries) == 2:
+        if 'metadata' in base_entries and pkg_dir_name in base_entries:
+            check_status_1 = True
 
     # Inside the source directory, one file that is executable and two
     #   directories, 'etc' and 'lib'
-    if len(os.listdir(source_location + '/' + os.path.basename(os.path.normpath(source_location)))) == 3:
-        if 'etc' in os.listdir(source_location + '/' + os.path.basename(os.path.normpath(source_location))):
-            if 'lib' in os.listdir(source_location + '/' + os.path.basename(os.path.normpath(source_location))):
-                check_status_2 = True
+    if len(sub_entries) == 3:
+        if 'etc' in sub_entries and 'lib' in sub_entries:
+            check_status_2 = True
 
     # All other files and directories must be in either
     #   source/etc or source/lib
@@ -601,9 +897,10 @@ def init_package_directory(source_location):
         Boolean:  True if successful and False if not able to create files and directories
 
     """
+    import configparser
     init_success = False
     
-    if os.path.isabs(source_location) is not True:
+    if not os.path.isabs(source_location):
         source_location = os.path.abspath(source_location)
 
     try:
@@ -656,23 +953,14 @@ def validate_metadata(metadata_path):
 
     """
     metadata_is_valid = False
-    metadata = configparser.ConfigParser(delimiters='=')
-    metadata.read(metadata_path)
-    metadata_data = {}
-    for section in metadata.sections():
-        metadata_data[section] = {}
-        for option in metadata.options(section):
-            metadata_data[section][option] = metadata.get(section, option)
-    if len(list(metadata_data.keys())) == 1:
-        if list(metadata_data.keys())[0] == 'METADATA':
-            if len(list(metadata_data['METADATA'].keys())) == 6:
-                if 'name' in list(metadata_data['METADATA'].keys()) \
-                    and 'version' in list(metadata_data['METADATA'].keys()) \
-                        and 'description' in list(metadata_data['METADATA'].keys()) \
-                            and 'author_name' in list(metadata_data['METADATA'].keys()) \
-                                and 'author_email' in list(metadata_data['METADATA'].keys()) \
-                                    and 'website' in list(metadata_data['METADATA'].keys()):
-                                        metadata_is_valid = True
+    metadata_data = FastConfigParser().read(metadata_path)
+    if len(metadata_data) == 1 and 'METADATA' in metadata_data:
+        fields = metadata_data['METADATA']
+        if len(fields) == 6:
+            if 'name' in fields and 'version' in fields and 'description' in fields \
+                    and 'author_name' in fields and 'author_email' in fields \
+                    and 'website' in fields:
+                metadata_is_valid = True
 
     return metadata_is_valid
 
@@ -688,23 +976,34 @@ def init_package_database(db_location):
 
     """
     try:
-        if os.path.isdir(db_location) is True:
-            newdb = open(os.path.normpath(db_location) + '/packages.hdb', 'a')
-            print('Creating new package database at \'%s\'.' % (os.path.normpath(db_location) + '/packages.hdb'))
+        if os.path.isdir(db_location):
+            db_path = os.path.normpath(db_location) + '/packages.hdb'
         elif os.path.basename(db_location) == 'packages.hdb':
-            newdb = open(db_location, 'a')
-            print('Creating new package database at \'%s\'.' % db_location)
+            db_path = db_location
         else:
-            os.makedirs(db_location, exist_ok=True)
-            newdb = open(os.path.normpath(db_location) + '/packages.hdb', 'a')
-            print('Creating new package database at \'%s\'.' % (os.path.normpath(db_location) + '/packages.hdb'))
+            db_path = os.path.normpath(db_location) + '/packages.hdb'
+            try:
+                os.makedirs(db_location, exist_ok=True)
+            except FileExistsError:
+                # db_location names an existing file, so there is no
+                # directory to put a database in
+                print('Unable to create new package database at \'%s\'.' % db_location)
+                print('Check path and/or permissions.')
+                return False
 
-        newdb.write('[INSTALLED]\n')
-        newdb.write('\n')
-        newdb.write('[AVAILABLE]\n')
+        # Mode 'x' fails loudly if the database already exists; the old append
+        # mode silently tacked a second pair of section headers onto it
+        with open(db_path, 'x') as newdb:
+            newdb.write('[INSTALLED]\n\n[AVAILABLE]\n')
+        print('Creating new package database at \'%s\'.' % db_path)
 
         return True
 
+    except FileExistsError:
+        print('Package database already exists at \'%s\'.' % db_path)
+
+        return False
+
     except OSError:
         print('Unable to create new package database at \'%s\'.' % db_location)
         print('Check path and/or permissions.')
@@ -712,6 +1011,26 @@ def init_package_database(db_location):
         return False
 
 
+def _section_ok(section):
+    """Validate every entry of one package database section in a single pass
+
+    Args:
+        section:  dictionary mapping package names to version strings
+
+    Returns:
+        Boolean:  True if every name and version conforms to hkg spec
+
+    """
+    for package_name, package_ver in section.items():
+        # Package names must be lowercase letters and only lowercase letters
+        if not _PKGNAME_RE.fullmatch(package_name):
+            return False
+        # Versions are in \d.\d format
+        if not _VERSION_RE.fullmatch(package_ver):
+            return False
+    return True
+
+
 def validate_package_database(db_location):
     """Validate package database conforms to hkg specifications
 
@@ -722,30 +1041,99 @@ def validate_package_database(db_location):
         Boolean:  True if package database conforms to spec, False if it does not
 
     """
-    testdb = configparser.ConfigParser(delimiters='=')
-    testdb.read(db_location)
-    db_data = testdb._sections
-    db_is_valid = False
-
-    # Make sure there are only 2 sections
-    if len(list(db_data.keys())) == 2:
-        # Make sure they are named correctly
-        if 'INSTALLED' in list(db_data.keys()) and 'AVAILABLE' in list(db_data.keys()):
-            # Make sure all the package names in each section are lowercase letters and only lowercase letters
-            if all(package_name.islower() for package_name in list(db_data['INSTALLED'].keys())) \
-                and all(package_name.islower() for package_name in list(db_data['AVAILABLE'].keys())) \
-                    and all(package_name.isalpha() for package_name in list(db_data['INSTALLED'].keys())) \
-                    and all(package_name.isalpha() for package_name in list(db_data['AVAILABLE'].keys())):
-                            # Make sure each package version is in \d.\d format
-                            # Note:  Changing the '1' to a '2' in the replace() methods will allow \d.\d.\d version-ing
-                            if all(package_ver.replace('.', '', 1).isdigit() for package_ver in
-                                    list(db_data['INSTALLED'].values())) \
-                                    and all(package_ver.replace('.', '', 1).isdigit() for package_ver in
-                                            list(db_data['AVAILABLE'].values())):
-                                            # All tests have passed!
-                                            db_is_valid = True
-
-    return db_is_valid
+    db_data = FastConfigParser().read(db_location)
+
+    # Make sure there are only 2 sections, named correctly, and that every
+    # entry in each checks out; each section is walked exactly once
+    return (len(db_data) == 2
+            and 'INSTALLED' in db_data and 'AVAILABLE' in db_data
+            and _section_ok(db_data['INSTALLED'])
+            and _section_ok(db_data['AVAILABLE']))
+
+
+@functools.lru_cache(maxsize=8)
+def _load_db(db_location, db_mtime_ns):
+    """Parse a package database, memoized on its path and modification time
+
+    Args:
+        db_location:  filesystem location of the package database
+        db_mtime_ns:  the file's st_mtime_ns, or None if it does not exist;
+                      only present so the cache key changes when the file does
+
+    Returns:
+        Dictionary mapping each section name to its name/version dictionary
+
+    """
+    return FastConfigParser().read(db_location)
+
+
+def _flush_db(pkg_db, db_location):
+    """Write a package database back to disk and invalidate the parse cache
+
+    The sections are emitted directly with a join instead of going
+    through configparser's per-key formatting pass, and entries are
+    sorted so the same contents always produce the same bytes.
+
+    Args:
+        pkg_db:  dictionary of sections to serialize
+        db_location:  filesystem location to write it to
+
+    """
+    db_lines = []
+    for db_section in pkg_db:
+        db_lines.append('[%s]' % db_section)
+        for db_pkgname, db_pkgver in sorted(pkg_db[db_section].items()):
+            db_lines.append('%s = %s' % (db_pkgname, db_pkgver))
+        db_lines.append('')
+    # The cache is invalidated even if the write fails, so a mutated parse
+    # can never outlive an untouched file
+    try:
+        with open(db_location, 'w') as pkg_db_file:
+            pkg_db_file.write('\n'.join(db_lines))
+    finally:
+        _load_db.cache_clear()
+
+
+def _db_set(pkg_db, db_location, db_section, db_pkgname, db_pkgver):
+    # Add a new entry in a section, or change the version of an existing one
+    pkg_db[db_section][db_pkgname] = db_pkgver
+    _flush_db(pkg_db, db_location)
+    return True
+
+
+def _db_delete(pkg_db, db_location, db_section, db_pkgname, db_pkgver):
+    # Delete an entry from a section; deleting a name that isn't listed is a
+    # no-op so the action always returns a Boolean, as it always has
+    pkg_db[db_section].pop(db_pkgname, None)
+    _flush_db(pkg_db, db_location)
+    return True
+
+
+def _db_check(pkg_db, db_location, db_section, db_pkgname, db_pkgver):
+    # Returns True if package name exists in specified section of package database, False if not found
+    return db_pkgname in pkg_db[db_section]
+
+
+def _db_version(pkg_db, db_location, db_section, db_pkgname, db_pkgver):
+    # Returns the version number of the package name requested
+    return pkg_db[db_section][db_pkgname]
+
+
+def _db_list(pkg_db, db_location, db_section, db_pkgname, db_pkgver):
+    # Returns a list of all packages listed under specified section
+    return list(pkg_db[db_section].keys())
+
+
+# Action names map straight to handlers; 'create' and 'update' always were
+# the same write
+_DB_ACTIONS = {
+    'create': _db_set,
+    'update': _db_set,
+    'delete': _db_delete,
+    'check': _db_check,
+    'version': _db_version,
+    'list': _db_list,
+}
 
 
 def package_database_api(db_location, db_action, db_section, db_pkgname, db_pkgver):
@@ -762,50 +1150,62 @@ def package_database_api(db_location, db_action, db_section, db_pkgname, db_pkgv
         Boolean:  True if update operation completed successfully or false if it failed
 
     """
-    pkg_db = configparser.ConfigParser(delimiters='=')
-    pkg_db.read(db_location)
-
-    if db_action == 'create':
-        # Add a new entry in a section
-        pkg_db[db_section][db_pkgname] = db_pkgver
-        pkg_db_file = open(db_location, 'w')
-        pkg_db.write(pkg_db_file)
-        pkg_db_file.close()
-        return True
+    handler = _DB_ACTIONS.get(db_action)
+    if handler is None:
+        # Didn't get a valid db_action value so fail out of the function
+        return False
 
-    elif db_action == 'delete':
-        # Delete an existing entry from a section
-        pkg_db[db_section][db_pkgname] = db_pkgver
-        pkg_db_file = open(db_location, 'w')
-        del pkg_db[db_section][db_pkgname]
-        pkg_db.write(pkg_db_file)
-        pkg_db_file.close()
-        return True
+    # Loops in the listing paths call this once per package, so the parse is
+    # memoized on the file's mtime instead of re-reading the database each call
+    try:
+        db_mtime_ns = os.stat(db_location).st_mtime_ns
+    except OSError:
+        db_mtime_ns = None
+    pkg_db = _load_db(db_location, db_mtime_ns)
 
-    elif db_action == 'update':
-        # Change the version for an existing package in a section
-        # Might be able to combine 'create' and 'update' actions...
-        pkg_db[db_section][db_pkgname] = db_pkgver
-        pkg_db_file = open(db_location, 'w')
-        pkg_db.write(pkg_db_file)
-        pkg_db_file.close()
-        return True
+    return handler(pkg_db, db_location, db_section, db_pkgname, db_pkgver)
 
-    elif db_action == 'check':
-        # Returns True if package name exists in specified section of package database, False if not found
-        return db_pkgname in list(pkg_db[db_section].keys())
 
-    elif db_action == 'version':
-        # Returns the version number of the package name requested
-        return pkg_db[db_section][db_pkgname]
+def package_database_api_batch(db_location, db_changes):
+    """Apply several database changes with a single read and a single write
 
-    elif db_action == 'list':
-        # Returns a list of all packages listed under specified section
-        return list(pkg_db[db_section].keys())
+    Calling package_database_api in a loop rewrites the whole file once per
+    change; bulk flows should collect their changes and flush them here in
+    one transaction.
 
-    else:
-        # Didn't get a valid db_action value so fail out of the function
-        return False
+    Args:
+        db_location:  filesystem location of package database
+        db_changes:  list of (db_action, db_section, db_pkgname, db_pkgver)
+                     tuples; only the mutating actions 'create', 'update',
+                     and 'delete' are meaningful in a batch
+
+    Returns:
+        Boolean:  True if every change was applied and written, False if any
+                 action name is invalid (in which case nothing is written)
+
+    """
+    # Refuse the whole batch up front rather than applying half of it
+    for db_action, db_section, db_pkgname, db_pkgver in db_changes:
+        if db_action not in ('create', 'update', 'delete'):
+            return False
+
+    try:
+        db_mtime_ns = os.stat(db_location).st_mtime_ns
+    except OSError:
+        db_mtime_ns = None
+    # Apply the changes to a copy of the cached parse; mutating it in place
+    # would leave half-applied state in the cache if anything failed before
+    # the flush landed on disk
+    pkg_db = {s: dict(v) for s, v in _load_db(db_location, db_mtime_ns).items()}
+
+    for db_action, db_section, db_pkgname, db_pkgver in db_changes:
+        if db_action == 'delete':
+            pkg_db[db_section].pop(db_pkgname, None)
+        else:
+            pkg_db[db_section][db_pkgname] = db_pkgver
+
+    _flush_db(pkg_db, db_location)
+    return True
 
 
 def list_packages(pkg_source):
@@ -818,52 +1218,97 @@ def list_packages(pkg_source):
         Boolean:  True if able to list packages from specified source, False if not
 
     """
-    config_data = load_config(os.path.expanduser('~'))
+    config_data = load_config(HOME)
 
-    # List packages from the local package database
+    # List packages from the local package database, parsed once rather than
+    # through a name lookup plus a version lookup per package
     if pkg_source == 'local':
-        source_list = package_database_api(os.path.expanduser('~/.local/share/hkg/packages.hdb'), 'list',
-                                           'INSTALLED', 'none', 'none')
+        installed = FastConfigParser().read(PKG_DB).get('INSTALLED', {})
 
         print('Packages installed locally:')
-        for i in source_list:
-            print('%s : %s' % (i, package_database_api(os.path.expanduser('~/.local/share/hkg/packages.hdb'),
-                  'version', 'INSTALLED', i, None)))
+        for i in installed:
+            print('%s : %s' % (i, installed[i]))
 
         return True
 
     # List packages from remote package databases
-    elif pkg_source in list(config_data['SOURCES'].keys()) or pkg_source == 'all':
+    elif pkg_source in config_data['SOURCES'] or pkg_source == 'all':
         if pkg_source == 'all':
-            source_list = list(config_data['SOURCES'].keys())
+            source_list = list(config_data['SOURCES'])
         else:
             source_list = [pkg_source]
 
-        for s in source_list:
+        # Fetch every requested database concurrently, then print in
+        # configured order so the output stays deterministic
+        remote_dbs = _fetch_remote_dbs(source_list)
 
-            # Download the remote repo's package database
-            try:
-                remote_db = requests.get(s + '/packages.hdb')
-            except ConnectionError:
+        all_reachable = True
+        for s in source_list:
+            if s not in remote_dbs:
                 print('Unable to connect to requested repository.')
-                return False
-
-            # Load and parse the package database
-            remote_pkg_data = configparser.ConfigParser(delimiters='=')
-            remote_pkg_data.read_string(remote_db.text)
+                all_reachable = False
+                continue
 
             # Print out using 'package_name : package_version' formatting
             print('Packages available at %s:' % s)
-            for i in list(remote_pkg_data['AVAILABLE'].keys()):
-                print('%s : %s' % (i, remote_pkg_data['AVAILABLE'][i]))
+            for i, version in remote_dbs[s]['AVAILABLE'].items():
+                print('%s : %s' % (i, version))
 
-        return True
+        return all_reachable
 
     else:
         print('It appears `%s` is not a valid or configured repository.' % pkg_source)
         return False
 
 
+@functools.lru_cache(maxsize=8)
+def _load_pkg_metadata(archive_path, archive_mtime_ns):
+    """Read and parse the metadata member of a cached .hkg archive
+
+    The archive is scanned in streaming mode and the read stops at the
+    metadata member near the front, so the rest of the payload is never
+    decompressed.  Results are memoized on the archive's mtime so repeat
+    queries against the same cached package skip the archive entirely,
+    and also written through to a content-keyed JSON file in the cache
+    directory so later hkg invocations never reopen the archive at all.
+
+    Args:
+        archive_path:  filesystem path of the .hkg archive
+        archive_mtime_ns:  the archive's st_mtime_ns, part of the cache key
+
+    Returns:
+        Parsed metadata as a dictionary of dictionaries; empty if the
+        archive has no metadata member
+
+    """
+    import tarfile
+    # The on-disk entry is keyed on the archive's leading bytes and size
+    # rather than its mtime, so a re-downloaded but identical archive
+    # still hits
+    with open(archive_path, 'rb') as archive_file:
+        archive_head = archive_file.read(65536)
+    digest = hashlib.sha1(archive_head + b'%d' % os.path.getsize(archive_path)).hexdigest()
+    meta_cache_path = HKG_CACHE + '/meta/' + digest + '.json'
+    try:
+        with open(meta_cache_path, 'r') as meta_cache_file:
+            return json.load(meta_cache_file)
+    except (OSError, ValueError):
+        pass
+
+    pkg_metadata = {}
+    with tarfile.open(archive_path, 'r|gz') as pkg_archive:
+        for member in pkg_archive:
+            if member.name.endswith('/metadata'):
+                pkg_metadata_content = pkg_archive.extractfile(member).read()
+                pkg_metadata = FastConfigParser().read_string(str(pkg_metadata_content, 'utf-8'))
+                break
+
+    os.makedirs(HKG_CACHE + '/meta', exist_ok=True)
+    with open(meta_cache_path, 'w') as meta_cache_file:
+        json.dump(pkg_metadata, meta_cache_file)
+    return pkg_metadata
+
+
 def package_info(pkg_name):
     """Prints out the metadata information for a specified package
 
@@ -876,50 +1321,51 @@ def package_info(pkg_name):
     """
     # Check cache to see if package has already been downloaded
     print('Checking cache for package `%s`...' % pkg_name)
-    if os.path.isfile(os.path.expanduser('~/.cache/hkg/%s.hkg' % pkg_name)):
+    if os.path.isfile(HKG_CACHE + '/%s.hkg' % pkg_name):
         print('Package found in cache.')
     else:
         # Download package if not in cache
         print('Package not found in cache.  Attempting to download package...')
-        config_data = load_config(os.path.expanduser('~'))
-        sources = list(config_data['SOURCES'].keys())
+        config_data = load_config(HOME)
+        sources = list(config_data['SOURCES'])
 
-        # Iterate through list of sources and download the package databases
-        for i in range(0, len(sources)):
-            # Check that package database for the name of the package being installed
-            try:
-                remote_db = requests.get(sources[i] + '/packages.hdb')
-            except ConnectionError:
-                continue
-            remote_pkg_data = configparser.ConfigParser(delimiters='=')
-            remote_pkg_data.read_string(remote_db.text)
+        # Probe every source's package database concurrently and walk the
+        # results in configured order
+        remote_dbs = _fetch_remote_dbs(sources)
+        for src, remote_pkg_data in remote_dbs.items():
             # If the package we want to install is in that list download it and proceed to decompress step
-            if pkg_name in list(remote_pkg_data['AVAILABLE'].keys()):
-                print('Located %s in repo %s!' % (pkg_name, sources[i]))
-                print('Downloading %s/%s.hkg' % (sources[i], pkg_name))
-                pkg_download = requests.get(sources[i] + '/' + pkg_name + '.hkg')
-                write_pkg_path = os.path.expanduser('~/.cache/hkg') + '/' + pkg_name + '.hkg'
-                write_pkg = open(write_pkg_path, 'wb')
-                for chunk in pkg_download.iter_content(1048576):  # 1MB (1024*1024) chunks
-                    write_pkg.write(chunk)
-                write_pkg.close()
+            if pkg_name in remote_pkg_data['AVAILABLE']:
+                print('Located %s in repo %s!' % (pkg_name, src))
+                print('Downloading %s/%s.hkg' % (src, pkg_name))
+                try:
+                    pkg_download = _SESSION.get(src + '/' + pkg_name + '.hkg', stream=True,
+                                                timeout=_DOWNLOAD_TIMEOUT)
+                    pkg_download.raise_for_status()
+                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                    continue
+                write_pkg_path = HKG_CACHE + '/' + pkg_name + '.hkg'
+                # Stream to a temp file and move it into place so a partial
+                # download can never pose as a cached package; decoding any
+                # transport compression keeps the cache entry identical to
+                # what install_package writes
+                pkg_download.raw.decode_content = True
+                with open(write_pkg_path + '.part', 'wb') as write_pkg:
+                    shutil.copyfileobj(pkg_download.raw, write_pkg, length=_COPY_BUFSIZE)
+                os.replace(write_pkg_path + '.part', write_pkg_path)
                 break
         else:
             print('Package `%s` was not found on any configured, reachable repositories.' % pkg_name)
             print('Please try a different name or add additional repositories.')
             return False
 
-    # Open package in memory and read in metadata
-    pkg_archive = tarfile.open(os.path.expanduser('~/.cache/hkg') + '/' + pkg_name + '.hkg', 'r')
-    pkg_metadata_object = pkg_archive.extractfile(pkg_archive.getmember('./' + pkg_name + '/metadata'))
-    pkg_metadata_content = pkg_metadata_object.read()
-    pkg_archive.close()
-    pkg_data = configparser.ConfigParser(delimiters='=')
-    pkg_data.read_string(str(pkg_metadata_content, 'utf-8'))
+    # Read the metadata out of the cached archive; repeat queries against the
+    # same package come straight from the parse cache
+    archive_path = HKG_CACHE + '/' + pkg_name + '.hkg'
+    pkg_data = _load_pkg_metadata(archive_path, os.stat(archive_path).st_mtime_ns)
 
     # Print contents of metadata file
-    for i in list(pkg_data['METADATA'].keys()):
-        print('%s : %s' % (i, pkg_data['METADATA'][i]))
+    for i, value in pkg_data['METADATA'].items():
+        print('%s : %s' % (i, value))
 
     return True
 
@@ -936,7 +1382,7 @@ def print_readme(prefix):
 
     # Check if HKG is installed
     if package_database_api(os.path.normpath(os.path.expanduser(prefix)) + '/.local/share/hkg/packages.hdb', 'check',
-                            'INSTALLED', 'hkg', '') is True:
+                            'INSTALLED', 'hkg', ''):
         # Check that the README file is where we expect
         if os.path.exists(readme_path):
             print('README file located.')
@@ -952,82 +1398,135 @@ def print_readme(prefix):
         print('Please install HKG to view contents of HKG\'s README.')
         return False
 
-if __name__ == '__main__':
+def _cli_install(args):
+    # hkg install <package_name>
+    print('Installing package:  %s' % args['<package_name>'])
+    install_package(args['<package_name>'], '')
 
-    # Load HKG settings
-    config_prefix = '~'
-    # If config file doesn't exist where expected, create it with default settings
-    if check_config_exists(config_prefix) is not True:
-        print('Configuration file not found.\nCreating default configuration file at `~/.config/hkg/settings.conf`.\n')
-        create_default_config(config_prefix)
 
-    # Load user's HKG settings into memory
-    load_config(config_prefix)
+def _cli_remove(args):
+    # hkg remove <package_name>
+    print('Removing package:  %s' % args['<package_name>'])
+    remove_package(args['<package_name>'])
 
-    # Parse command line arguments and load them into a dictionary
-    args = parse_args()
 
-    # Process flags, arguments, and switches
-    if args['install'] is True and args['<package_name>'] is not None:
-        print('Installing package:  %s' % args['<package_name>'])
-        install_package(args['<package_name>'], '')
+def _cli_update(args):
+    # hkg update [--no-preserve] (<package_name> | all)
+    print('Updating package:  %s' % args['<package_name>'])
+    update_package(args['<package_name>'], args['--no-preserve'])
 
-    elif args['remove'] is True and args['<package_name>'] is not None:
-        print('Removing package:  %s' % args['<package_name>'])
-        remove_package(args['<package_name>'])
 
-    elif args['update'] is True and args['<package_name>'] is not None:
-        print('Updating package:  %s' % args['<package_name>'])
-        update_package(args['<package_name>'], args['--no-preserve'])
+def _cli_info(args):
+    # hkg info <package_name>
+    print('Displaying metadata for package:  %s' % args['<package_name>'])
+    package_info(args['<package_name>'])
 
-    elif args['info'] is True and args['<package_name>'] is not None:
-        print('Displaying metadata for package:  %s' % args['<package_name>'])
-        package_info(args['<package_name>'])
 
-    elif args['repo'] is True and args['add'] is True and args['<repo_url>'] is not None:
-        print('Adding repo with URL:  %s' % args['<repo_url>'])
-        add_repo('~', args['<repo_url>'])
+def _cli_repo_add(args):
+    # hkg repo add <repo_url>
+    print('Adding repo with URL:  %s' % args['<repo_url>'])
+    add_repo('~', args['<repo_url>'])
 
-    elif args['repo'] is True and args['del'] is True and args['<repo_url>'] is not None:
-        print('Deleting repo with URL:  %s' % args['<repo_url>'])
-        del_repo('~', args['<repo_url>'])
 
-    elif args['repo'] is True and args['init'] is True and args['<path_to_repo>'] is not None:
-        print('Creating HKG repo at path:  %s' % args['<path_to_repo>'])
-        create_repo(args['<path_to_repo>'])
+def _cli_repo_del(args):
+    # hkg repo del <repo_url>
+    print('Deleting repo with URL:  %s' % args['<repo_url>'])
+    del_repo('~', args['<repo_url>'])
 
-    elif args['repo'] is True and args['update'] is True and args['<path_to_repo>'] is not None:
-        print('Updating repo database at path:  %s' % args['<path_to_repo>'])
-        update_repo(args['<path_to_repo>'])
 
-    elif args['list'] is True and args['repos'] is True:
-        print('Listing all configured repo URL\'s:')
-        list_repo('~')
+def _cli_repo_init(args):
+    # hkg repo init <path_to_repo>
+    print('Creating HKG repo at path:  %s' % args['<path_to_repo>'])
+    create_repo(args['<path_to_repo>'])
 
-    elif args['list'] is True and args['packages'] is True and args['<repo_url>'].lower() is 'local':
-        print('Listing all locally installed packages:')
-        list_packages(args['<repo_url>'])
 
-    elif args['list'] is True and args['packages'] is True and args['<repo_url>'].lower() is 'all':
+def _cli_repo_update(args):
+    # hkg repo update <path_to_repo>
+    print('Updating repo database at path:  %s' % args['<path_to_repo>'])
+    update_repo(args['<path_to_repo>'])
+
+
+def _cli_list_repos(args):
+    # hkg list repos
+    print('Listing all configured repo URL\'s:')
+    list_repo('~')
+
+
+def _cli_list_packages(args):
+    # hkg list packages (<repo_url> | all | local); the named listings used to
+    # be separate branches compared with `is`, which is never true for strings
+    # built at runtime
+    repo_url = args['<repo_url>']
+    if repo_url.lower() == 'local':
+        print('Listing all locally installed packages:')
+    elif repo_url.lower() == 'all':
         print('Listing packages available from all configured repositories:')
-        list_packages(args['<repo_url>'])
+    else:
+        print('Listing packages available from repo at:  %s' % repo_url)
+    list_packages(repo_url)
+
+
+def _cli_package_init(args):
+    # hkg package init <path_to_package_tree>
+    print('Creating new package skeleton at path:  %s' % args['<path_to_package_tree>'])
+    init_package_directory(args['<path_to_package_tree>'])
+
+
+def _cli_package(args):
+    # hkg package <path_to_package_tree>
+    print('Packaging source tree at path:  %s' % args['<path_to_package_tree>'])
+    create_package(args['<path_to_package_tree>'])
+
+
+def _cli_readme(args):
+    # hkg readme
+    print('Fetching contents of HKG\'s README...')
+    print_readme('~')
+
 
-    elif args['list'] is True and args['packages'] is True and args['<repo_url>'] is not None:
-        print('Listing packages available from repo at:  %s' % args['<repo_url>'])
-        list_packages(args['<repo_url>'])
+# Each docopt usage line turns exactly one combination of command words True,
+# so the set of true flags picks the handler with a single dictionary lookup
+# instead of walking an elif chain; docopt has already guaranteed the
+# positional each handler indexes
+_CLI_ACTIONS = {
+    frozenset(['install']): _cli_install,
+    frozenset(['remove']): _cli_remove,
+    frozenset(['update']): _cli_update,
+    frozenset(['info']): _cli_info,
+    frozenset(['repo', 'add']): _cli_repo_add,
+    frozenset(['repo', 'del']): _cli_repo_del,
+    frozenset(['repo', 'init']): _cli_repo_init,
+    frozenset(['repo', 'update']): _cli_repo_update,
+    frozenset(['list', 'repos']): _cli_list_repos,
+    frozenset(['list', 'packages']): _cli_list_packages,
+    frozenset(['package', 'init']): _cli_package_init,
+    frozenset(['package']): _cli_package,
+    frozenset(['readme']): _cli_readme,
+}
 
-    elif args['package'] is True and args['init'] is True and args['<path_to_package_tree>'] is not None:
-        print('Creating new package skeleton at path:  %s' % args['<path_to_package_tree>'])
-        init_package_directory(args['<path_to_package_tree>'])
 
-    elif args['package'] is True and args['init'] is False and args['<path_to_package_tree>'] is not None:
-        print('Packaging source tree at path:  %s' % args['<path_to_package_tree>'])
-        create_package(args['<path_to_package_tree>'])
+if __name__ == '__main__':
+
+    # Load HKG settings
+    config_prefix = '~'
+    # If config file doesn't exist where expected, create it with default settings
+    if not check_config_exists(config_prefix):
+        print('Configuration file not found.\nCreating default configuration file at `~/.config/hkg/settings.conf`.\n')
+        create_default_config(config_prefix)
+
+    # Load user's HKG settings into memory
+    load_config(config_prefix)
+
+    # Parse command line arguments and load them into a dictionary
+    args = parse_args()
 
-    elif args['readme'] is True:
-        print('Fetching contents of HKG\'s README...')
-        print_readme('~')
+    # The command words are the dictionary keys docopt set to True; option
+    # flags like --no-preserve are left out so they don't change the key
+    flags = frozenset(k for k, v in args.items() if v is True and not k.startswith('-'))
 
+    handler = _CLI_ACTIONS.get(flags)
+    if handler is not None:
+        handler(args)
     else:
         print('No valid argument sets were able to be parsed.')
         print('Please see `hkg --help` for usage information.')